@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from run_jobs import ALGORITHMS, seed_generators
+from universe import StockUniverse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_pipeline'))
+from transform import RAW_DIR, TRADING_DAYS_PER_MONTH, daily_returns, load_panel  # noqa: E402
+
+WINDOW = 126  # trading days of history behind each rebalance (~6 months)
+REBALANCE_EVERY = 21  # trading days between rebalances (~monthly)
+TRADING_DAYS_PER_YEAR = 252
+
+# Walk-forward: at every rebalance date the chosen optimizer (any run_jobs algorithm) sees only the
+# trailing window's price, monthly return and risk per ticker, and its portfolio is held from the next
+# day until the following rebalance. Optimizer runs for different dates are independent and go to a
+# process pool; P&L, turnover and drawdown are then computed on the whole date x ticker grid at once.
+
+def _rebalance(task):
+    algorithm, params, seed, names, prices, returns, risks = task
+    params = dict(params)
+    if 'portfolio_size' in params:
+        params['portfolio_size'] = min(params['portfolio_size'], len(names))
+    seed_generators(seed)
+    portfolio = ALGORITHMS[algorithm](StockUniverse(names, prices, risks, returns), params, seed)
+    if portfolio is None:
+        return {}
+    weights = getattr(portfolio, 'weights', None)
+    if weights is None:
+        weights = np.full(len(portfolio.stocks), 1.0 / len(portfolio.stocks))
+    return {stock.name: float(w) for stock, w in zip(portfolio.stocks, weights)}
+
+def walk_forward(panel, algorithm, params, window=WINDOW, rebalance_every=REBALANCE_EVERY, seed=0, processes=None):
+    # Target weights, one row per rebalance date (rows sum to 1, or 0 where no ticker qualified).
+    returns = daily_returns(panel)
+    # Trailing statistics for every date in one pass; a ticker qualifies with a full window of returns.
+    monthly_return = returns.rolling(window, min_periods=window).mean() * TRADING_DAYS_PER_MONTH
+    risk = returns.rolling(window, min_periods=window).std() * TRADING_DAYS_PER_MONTH ** 0.5
+    prices = panel.ffill()
+
+    positions = list(range(window, len(panel) - 1, rebalance_every))
+    if not positions:
+        raise ValueError(f"Not enough history for window={window}: {len(panel)} days of prices, "
+                         f"at least {window + 2} needed for one rebalance.")
+    tasks = []
+    for i, position in enumerate(positions):
+        eligible = (risk.iloc[position] > 0) & prices.iloc[position].notna()
+        tickers = list(panel.columns[eligible.to_numpy()])
+        tasks.append((algorithm, params, seed + i, tickers, prices.iloc[position][tickers].to_numpy(),
+                      monthly_return.iloc[position][tickers].to_numpy(), risk.iloc[position][tickers].to_numpy()))
+
+    if processes and processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            chosen = list(pool.map(_rebalance, tasks))
+    else:
+        chosen = [_rebalance(task) for task in tasks]
+
+    weights = pd.DataFrame(chosen, index=panel.index[positions], columns=panel.columns)
+    return weights.fillna(0.0)
+
+def backtest(panel, weights, cost_bps=0.0):
+    # Buy-and-hold between rebalances: each holding drifts with its own returns, and turnover is measured
+    # against the drifted weights on the rebalance date. cost_bps is charged on turnover.
+    if weights.empty:
+        raise ValueError("No rebalance dates to backtest.")
+    returns = daily_returns(panel).fillna(0.0).to_numpy()
+    positions = panel.index.get_indexer(weights.index)
+    target = weights.to_numpy()
+    num_days = len(panel)
+
+    # Segment j covers the days after rebalance j up to and including rebalance j + 1.
+    segment = np.searchsorted(positions, np.arange(num_days), side='left') - 1
+    held = segment >= 0
+    days = np.flatnonzero(held)
+    growth = pd.DataFrame(1.0 + returns[days]).groupby(segment[days]).cumprod().to_numpy()
+    values = target[segment[days]] * growth  # value per ticker, starting from the target weights
+
+    value = values.sum(axis=1)
+    start_value = target[segment[days]].sum(axis=1)
+    first_day = np.r_[True, segment[days][1:] != segment[days][:-1]]
+    previous_value = np.where(first_day, start_value, np.r_[0.0, value[:-1]])
+    daily = np.divide(value, previous_value, out=np.ones_like(value), where=previous_value > 0) - 1.0
+
+    # Weights just before each rebalance: drifted values on that date, normalized (cash before the first).
+    drifted = np.zeros_like(target)
+    row_of_day = np.full(num_days, -1)
+    row_of_day[days] = np.arange(len(days))
+    ends = row_of_day[positions[1:]]
+    end_values = values[ends]
+    totals = end_values.sum(axis=1, keepdims=True)
+    drifted[1:] = np.divide(end_values, totals, out=np.zeros_like(end_values), where=totals > 0)
+    turnover = np.abs(target - drifted).sum(axis=1)
+
+    daily[first_day] -= turnover * cost_bps / 10_000
+    portfolio_returns = pd.Series(daily, index=panel.index[days], name='return')
+    equity = (1.0 + portfolio_returns).cumprod().rename('equity')
+    drawdown = (equity / equity.cummax() - 1.0).rename('drawdown')
+    return {
+        'returns': portfolio_returns,
+        'equity': equity,
+        'drawdown': drawdown,
+        'turnover': pd.Series(turnover, index=weights.index, name='turnover'),
+        'weights': weights,
+    }
+
+def summarize(result):
+    returns = result['returns']
+    years = len(returns) / TRADING_DAYS_PER_YEAR
+    volatility = returns.std() * TRADING_DAYS_PER_YEAR ** 0.5
+    annual_return = result['equity'].iloc[-1] ** (1 / years) - 1 if years else float('nan')
+    return {
+        'total_return': float(result['equity'].iloc[-1] - 1),
+        'annualized_return': float(annual_return),
+        'annualized_volatility': float(volatility),
+        'sharpe': float(returns.mean() * TRADING_DAYS_PER_YEAR / volatility) if volatility else float('nan'),
+        'max_drawdown': float(result['drawdown'].min()),
+        'average_turnover': float(result['turnover'].mean()),
+        'rebalances': len(result['weights']),
+    }
+
+# --- Main program ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of an optimizer over data/raw prices.")
+    parser.add_argument('algorithm', choices=sorted(ALGORITHMS))
+    parser.add_argument('--params', default='{}', help="optimizer parameters as JSON (see run_jobs.py)")
+    parser.add_argument('--raw-dir', default=str(RAW_DIR))
+    parser.add_argument('--window', type=int, default=WINDOW)
+    parser.add_argument('--rebalance-every', type=int, default=REBALANCE_EVERY)
+    parser.add_argument('--cost-bps', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    panel = load_panel(sorted(Path(args.raw_dir).glob("*.csv")), processes=args.processes)
+    weights = walk_forward(panel, args.algorithm, json.loads(args.params), args.window, args.rebalance_every,
+                           args.seed, args.processes)
+    result = backtest(panel, weights, args.cost_bps)
+    for key, value in summarize(result).items():
+        print(f"{key:>22}: {value:.4f}" if isinstance(value, float) else f"{key:>22}: {value}")
@@ -0,0 +1,21 @@
+import random
+import time
+from portfolio_GA_New import GeneticAlgorithm
+from universe import synthetic_universe
+
+UNIVERSE_SIZES = [500, 5000, 50000]
+POPULATION_SIZE = 200
+PORTFOLIO_SIZE = 20
+GENERATIONS = 20
+
+# --- Main program ---
+if __name__ == "__main__":
+    random.seed(42)
+    print(f"Population: {POPULATION_SIZE}, portfolio size: {PORTFOLIO_SIZE}, generations: {GENERATIONS}")
+    print(f"{'Universe':>10} {'ms/generation':>15}")
+    for num_stocks in UNIVERSE_SIZES:
+        ga = GeneticAlgorithm(synthetic_universe(num_stocks, seed=42), POPULATION_SIZE, PORTFOLIO_SIZE)
+        start = time.perf_counter()
+        ga.run(GENERATIONS)
+        elapsed = time.perf_counter() - start
+        print(f"{num_stocks:>10} {1000 * elapsed / GENERATIONS:>15.2f}")
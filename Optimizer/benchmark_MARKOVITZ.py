@@ -0,0 +1,35 @@
+import time
+import numpy as np
+from portfolio_MARKOVITZ import MarkowitzModel
+from universe import synthetic_universe
+
+UNIVERSE_SIZES = [100, 500, 1000, 2000]
+FRONTIER_POINTS = 20
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+# --- Main program ---
+if __name__ == "__main__":
+    _, import_time = timed(lambda: __import__("cvxpy"))
+    print(f"cvxpy import (paid only by the general-covariance path): {1000 * import_time:.0f} ms")
+    print(f"Diagonal covariance, {FRONTIER_POINTS}-point frontier; times in ms")
+    print(f"{'Universe':>10} {'closed-form':>12} {'cvxpy':>12} {'frontier':>12} {'cvxpy frontier':>15} {'max |dw|':>10}")
+    for num_stocks in UNIVERSE_SIZES:
+        stocks = synthetic_universe(num_stocks, seed=42)
+        fast_model = MarkowitzModel(stocks)
+        cvxpy_model = MarkowitzModel(stocks, solver="CLARABEL", max_iter=1000)
+
+        fast, fast_time = timed(fast_model.optimize)
+        reference, cvxpy_time = timed(cvxpy_model.solve_cvxpy)
+
+        targets = np.linspace(fast.average_return(), fast_model.returns.max(), FRONTIER_POINTS)
+        fast_frontier, fast_frontier_time = timed(lambda: [fast_model.solve(t) for t in targets])
+        cvxpy_frontier, cvxpy_frontier_time = timed(lambda: [cvxpy_model.solve_cvxpy(t) for t in targets])
+
+        error = max(np.max(np.abs(a.weights - b.weights))
+                    for a, b in zip([fast] + fast_frontier, [reference] + cvxpy_frontier))
+        print(f"{num_stocks:>10} {1000 * fast_time:>12.2f} {1000 * cvxpy_time:>12.2f} "
+              f"{1000 * fast_frontier_time:>12.2f} {1000 * cvxpy_frontier_time:>15.2f} {error:>10.2e}")
@@ -0,0 +1,162 @@
+import argparse
+import json
+import random
+import time
+import tracemalloc
+import numpy as np
+from portfolio_GA_New import GeneticAlgorithm, VectorizedGeneticAlgorithm
+from portfolio_MARKOVITZ import MarkowitzModel
+from portfolio_PSO import PSO, VectorizedPSO
+from portfolio_Reinforcement import ReinforcementLearner
+from universe import synthetic_universe
+
+UNIVERSE_SIZES = [100, 1000, 10000]
+PORTFOLIO_SIZE = 20
+POPULATION_SIZE = 100  # GA population and PSO swarm
+ITERATIONS = 30  # generations / PSO iterations / RL rounds
+RL_EPISODES_PER_ROUND = 5
+FRONTIER_POINTS = 20
+SEED = 42
+
+# Every optimizer is driven one iteration at a time so its best score can be recorded as it converges.
+# best_score is the objective the subset optimizers share: average return over average risk of their
+# best PORTFOLIO_SIZE equal-weighted stocks. Markowitz weights the whole universe, so its score (weighted
+# return over portfolio standard deviation) is not comparable and is reported as frontier_score
+# instead. An evaluation is one portfolio scored.
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+def count_calls(obj, method_name, counter, size=lambda *args: 1):
+    # Wraps a bound method on this instance only, so the class itself is left untouched.
+    method = getattr(obj, method_name)
+    def counted(*args):
+        counter.count += size(*args)
+        return method(*args)
+    setattr(obj, method_name, counted)
+
+def score(portfolio):
+    return float(portfolio.average_return() / portfolio.average_risk())
+
+def run_ga(stocks, counter, iterations):
+    ga = GeneticAlgorithm(stocks, POPULATION_SIZE, PORTFOLIO_SIZE)
+    count_calls(ga, 'evaluate_portfolio', counter)
+    return [score(ga.run(1)) for _ in range(iterations)]
+
+def run_vectorized_ga(stocks, counter, iterations):
+    ga = VectorizedGeneticAlgorithm(stocks, POPULATION_SIZE, PORTFOLIO_SIZE, seed=SEED)
+    count_calls(ga, 'evaluate_population', counter, size=len)
+    curve = []
+    for _ in range(iterations):
+        ga.evolve(1)
+        curve.append(ga.best()[1])
+    return curve
+
+def run_pso(stocks, counter, iterations):
+    pso = PSO(stocks, POPULATION_SIZE, PORTFOLIO_SIZE, 1)
+    count_calls(pso, 'evaluate', counter)
+    curve = []
+    for _ in range(iterations):
+        pso.run()
+        curve.append(pso.global_best_score)
+    return curve
+
+def run_vectorized_pso(stocks, counter, iterations):
+    pso = VectorizedPSO(stocks, POPULATION_SIZE, PORTFOLIO_SIZE, 1, seed=SEED)
+    count_calls(pso, 'evaluate', counter, size=len)
+    curve = []
+    for _ in range(iterations):
+        pso.run()
+        curve.append(pso.global_best_score)
+    return curve
+
+def run_rl(stocks, counter, iterations):
+    rl = ReinforcementLearner(stocks, PORTFOLIO_SIZE, RL_EPISODES_PER_ROUND)
+    count_calls(rl, 'reward_from_sums', counter)
+    curve = []
+    for _ in range(iterations):
+        portfolio = rl.learn()
+        curve.append(max(curve[-1] if curve else -np.inf, score(portfolio)))
+    return curve
+
+def run_markowitz(stocks, counter, iterations):
+    # Not iterative: one point, the best weighted return / portfolio std along the efficient frontier.
+    frontier = MarkowitzModel(stocks).efficient_frontier(FRONTIER_POINTS)
+    counter.count += len(frontier)
+    return [max(score(portfolio) for portfolio in frontier)]
+
+SEPARATELY_SCORED = {'markowitz'}
+
+OPTIMIZERS = {
+    'ga': run_ga,
+    'vectorized_ga': run_vectorized_ga,
+    'pso': run_pso,
+    'vectorized_pso': run_vectorized_pso,
+    'rl': run_rl,
+    'markowitz': run_markowitz,
+}
+
+def benchmark(name, num_stocks, iterations=ITERATIONS):
+    stocks = synthetic_universe(num_stocks, seed=SEED)
+    run = OPTIMIZERS[name]
+
+    random.seed(SEED)
+    counter = Counter()
+    start = time.perf_counter()
+    curve = run(stocks, counter, iterations)
+    seconds = time.perf_counter() - start
+
+    # Memory is measured on a second, identical run: tracemalloc would distort the timing.
+    random.seed(SEED)
+    tracemalloc.start()
+    run(stocks, Counter(), iterations)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {
+        'optimizer': name,
+        'num_stocks': num_stocks,
+        'seconds': seconds,
+        'peak_memory_bytes': peak_memory,
+        'evaluations': counter.count,
+        'evaluations_per_second': counter.count / seconds if seconds else None,
+        'best_score': float(curve[-1]),
+        'curve': [float(s) for s in curve],
+    }
+    if name in SEPARATELY_SCORED:
+        result['frontier_score'] = result.pop('best_score')
+        result['best_score'] = None
+        result['curve'] = []
+    return result
+
+# --- Main program ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare optimizer speed, memory and quality.")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help="JSON results file")
+    parser.add_argument('--sizes', type=int, nargs='+', default=UNIVERSE_SIZES, help="universe sizes")
+    parser.add_argument('--optimizers', nargs='+', choices=sorted(OPTIMIZERS), default=list(OPTIMIZERS))
+    parser.add_argument('--iterations', type=int, default=ITERATIONS)
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'Optimizer':>15} {'Universe':>10} {'seconds':>10} {'peak MiB':>10} {'evals/s':>12} {'best score':>11}")
+    for num_stocks in args.sizes:
+        for name in args.optimizers:
+            result = benchmark(name, num_stocks, args.iterations)
+            results.append(result)
+            best_score = result['best_score']
+            if best_score is None:
+                best_score = f"({result['frontier_score']:.4f})"  # frontier score, not comparable
+            else:
+                best_score = f"{best_score:.4f}"
+            print(f"{name:>15} {num_stocks:>10} {result['seconds']:>10.3f} "
+                  f"{result['peak_memory_bytes'] / 2 ** 20:>10.2f} {result['evaluations_per_second']:>12.0f} "
+                  f"{best_score:>11}")
+
+    if SEPARATELY_SCORED & set(args.optimizers):
+        print("Scores in parentheses: Markowitz frontier score over the whole universe, not comparable.")
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'portfolio_size': PORTFOLIO_SIZE, 'population_size': POPULATION_SIZE, 'seed': SEED,
+                   'results': results}, f, indent=2)
+    print(f"Results written to {args.output}")
@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from worker import WorkerClient
+
+OPTIMIZER_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_DIR = os.path.join(OPTIMIZER_DIR, '..', 'data_pipeline')
+MODULES = ['numpy', 'pandas', 'cvxpy', 'universe', 'run_jobs', 'portfolio_GA_New', 'portfolio_MARKOVITZ',
+           'weighted_subsets', 'worker', 'transform', 'incremental_stats', 'fetch_data']
+JOB = {'id': 'startup', 'algorithm': 'vga', 'seed': 1, 'universe': {'synthetic': 1000, 'seed': 1},
+       'params': {'population_size': 50, 'portfolio_size': 10, 'generations': 5}}
+REPEATS = 5
+
+# Start-up cost of a short optimizer job: every import is timed in a fresh interpreter (the fastest of
+# REPEATS runs, minus a bare interpreter start), then the same job is run as a fresh process and as a
+# request to a resident worker.py that already holds the modules and the universe.
+
+def run_python(code):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([OPTIMIZER_DIR, PIPELINE_DIR]))
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', code], cwd=OPTIMIZER_DIR, env=env, capture_output=True,
+                               text=True)
+    seconds = time.perf_counter() - start
+    return seconds, completed
+
+def fastest(code, repeats):
+    # Fastest wall time of repeats fresh interpreters, or None if the code fails (e.g. not installed).
+    times = []
+    for _ in range(repeats):
+        seconds, completed = run_python(code)
+        if completed.returncode != 0:
+            return None
+        times.append(seconds)
+    return min(times)
+
+def start_worker():
+    process = subprocess.Popen([sys.executable, os.path.join(OPTIMIZER_DIR, 'worker.py'), '--port', '0'],
+                               cwd=OPTIMIZER_DIR, stdout=subprocess.PIPE, text=True)
+    ready = process.stdout.readline()  # "... listening on host:port"
+    host, port = ready.split()[-1].rsplit(':', 1)
+    return process, host, int(port)
+
+def benchmark(modules, job, repeats):
+    interpreter = fastest('pass', repeats)
+    imports = {}
+    for module in modules:
+        seconds = fastest(f'import {module}', repeats)
+        imports[module] = None if seconds is None else seconds - interpreter
+
+    fresh = fastest(f'import json, run_jobs; run_jobs.run_job(json.loads({json.dumps(json.dumps(job))}))', repeats)
+
+    start = time.perf_counter()
+    process, host, port = start_worker()
+    worker_start = time.perf_counter() - start
+    try:
+        with WorkerClient(host, port) as client:
+            start = time.perf_counter()
+            client.run(job)
+            first_request = time.perf_counter() - start
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                warm = client.run(job)
+                times.append(time.perf_counter() - start)
+            client.shutdown()
+    finally:
+        process.wait(timeout=10)
+    return {
+        'interpreter_seconds': interpreter,
+        'import_seconds': imports,
+        'fresh_process_job_seconds': fresh,
+        'worker_start_seconds': worker_start,
+        'worker_first_request_seconds': first_request,
+        'worker_request_seconds': statistics.median(times),
+        'job_run_seconds': warm['seconds'],
+    }
+
+# --- Main program ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare import / start-up cost with a resident worker.")
+    parser.add_argument('-o', '--output', default='benchmark_startup.json', help="JSON results file")
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    args = parser.parse_args()
+
+    result = benchmark(args.modules, JOB, args.repeats)
+    print(f"{'import':>20} {'seconds':>10}")
+    for module, seconds in result['import_seconds'].items():
+        print(f"{module:>20} {'not installed' if seconds is None else f'{seconds:.3f}':>10}")
+    print(f"\n{'bare interpreter':>28}: {result['interpreter_seconds']:.3f}s")
+    print(f"{'job in a fresh process':>28}: {result['fresh_process_job_seconds']:.3f}s")
+    print(f"{'worker start':>28}: {result['worker_start_seconds']:.3f}s")
+    print(f"{'first worker request':>28}: {result['worker_first_request_seconds']:.3f}s")
+    print(f"{'warm worker request':>28}: {result['worker_request_seconds']:.3f}s "
+          f"(job itself {result['job_run_seconds']:.3f}s)")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'job': JOB, 'repeats': args.repeats, **result}, f, indent=2)
+    print(f"Results written to {args.output}")
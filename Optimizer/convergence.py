@@ -0,0 +1,81 @@
+import math
+import os
+import pickle
+import time
+
+class ConvergenceMonitor:
+    # Early-stopping rules for the iterative optimizers, checked once per generation / iteration / episode:
+    #   stall_window     stop after this many iterations without a significant improvement
+    #   tolerance        an improvement is significant if it beats the last significant best by this
+    #                    fraction of its magnitude (0: any increase counts)
+    #   max_seconds      wall-clock budget, carried across checkpoint/resume
+    #   max_evaluations  budget of scored portfolios, carried across checkpoint/resume
+    def __init__(self, stall_window=None, tolerance=0.0, max_seconds=None, max_evaluations=None):
+        self.stall_window = stall_window
+        self.tolerance = tolerance
+        self.max_seconds = max_seconds
+        self.max_evaluations = max_evaluations
+        self.best_score = -math.inf
+        self.reference_score = -math.inf  # best at the last significant improvement
+        self.stalled = 0
+        self.iterations = 0
+        self.evaluations = 0
+        self.elapsed_before = 0.0  # time spent before the last resume
+        self.started = None
+        self.reason = None
+
+    def elapsed(self):
+        return self.elapsed_before + (time.monotonic() - self.started if self.started is not None else 0.0)
+
+    def update(self, best_score, evaluations=0):
+        # Records one iteration; returns True when the run should stop (reason says why).
+        if self.started is None:
+            self.started = time.monotonic()
+        self.iterations += 1
+        self.evaluations += evaluations
+        self.best_score = max(self.best_score, best_score)
+        if math.isinf(self.reference_score) or best_score > self.reference_score + self.tolerance * abs(self.reference_score):
+            self.reference_score = best_score
+            self.stalled = 0
+        else:
+            self.stalled += 1
+
+        if self.stall_window is not None and self.stalled >= self.stall_window:
+            self.reason = f"no improvement in {self.stalled} iterations"
+        elif self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.reason = f"evaluation budget of {self.max_evaluations} reached"
+        elif self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            self.reason = f"time budget of {self.max_seconds}s reached"
+        return self.reason is not None
+
+    def state(self):
+        return {'best_score': self.best_score, 'reference_score': self.reference_score, 'stalled': self.stalled,
+                'iterations': self.iterations, 'evaluations': self.evaluations, 'elapsed': self.elapsed()}
+
+    def restore(self, state):
+        self.best_score = state['best_score']
+        self.reference_score = state['reference_score']
+        self.stalled = state['stalled']
+        self.iterations = state['iterations']
+        self.evaluations = state['evaluations']
+        self.elapsed_before = state['elapsed']
+        self.started = None
+        self.reason = None
+
+# --- Checkpoints ---
+# An optimizer's checkpoint is a dict of plain state (stock indexes, scores, random generator state,
+# monitor state) pickled to one file. Writes go through a temp file and os.replace, so a run killed
+# mid-write leaves the previous checkpoint intact.
+
+def save_checkpoint(path, state):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path):
+    # None when there is nothing to resume from.
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,73 @@
+import numpy as np
+
+# All estimators take daily returns (observations x stocks) and scale to the monthly horizon
+# used for risk in transform.process_file (std * sqrt(21)).
+TRADING_DAYS_PER_MONTH = 21
+
+class FactorCovariance:
+    # Sigma = F F^T + diag(d), stored in O(N * k) instead of O(N^2).
+    def __init__(self, factors, specific_variances):
+        self.factors = np.ascontiguousarray(factors, dtype=np.float64)
+        self.specific_variances = np.ascontiguousarray(specific_variances, dtype=np.float64)
+
+    @property
+    def num_factors(self):
+        return self.factors.shape[1]
+
+    def variance(self, weights):
+        w = np.asarray(weights, dtype=np.float64)
+        exposure = self.factors.T @ w
+        return exposure @ exposure + np.sum(self.specific_variances * w * w)
+
+    def diagonal(self):
+        return np.einsum('ij,ij->i', self.factors, self.factors) + self.specific_variances
+
+    def dense(self):
+        return self.factors @ self.factors.T + np.diag(self.specific_variances)
+
+def _complete_returns(daily_returns):
+    values = np.asarray(daily_returns, dtype=np.float64)
+    values = values[~np.isnan(values).any(axis=1)]
+    if len(values) < 2:
+        raise ValueError("At least two complete rows of daily returns are required.")
+    return values
+
+def sample_covariance(daily_returns, periods=TRADING_DAYS_PER_MONTH):
+    if hasattr(daily_returns, 'cov'):
+        return daily_returns.cov().to_numpy() * periods
+    return np.cov(np.asarray(daily_returns, dtype=float), rowvar=False) * periods
+
+def ledoit_wolf(daily_returns, periods=TRADING_DAYS_PER_MONTH):
+    # Ledoit-Wolf (2004) shrinkage towards mu * I. The shrunk matrix is (1 - s) X^T X / T + s * mu * I,
+    # so it is returned in factored form with the centered returns as loadings; the N x N matrix
+    # is never formed and the shrinkage intensity only needs the T x T Gram matrix.
+    x = _complete_returns(daily_returns)
+    x = x - x.mean(axis=0)
+    num_obs, num_stocks = x.shape
+    squared = x ** 2
+    variances = squared.sum(axis=0) / num_obs
+    mu = variances.sum() / num_stocks
+
+    gram = x @ x.T
+    delta_ = np.sum(gram ** 2) / num_obs ** 2
+    beta_ = np.sum(squared.sum(axis=1) ** 2)
+    beta = (beta_ / num_obs - delta_) / (num_stocks * num_obs)
+    delta = (delta_ - 2.0 * mu * variances.sum() + num_stocks * mu ** 2) / num_stocks
+    shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+
+    factors = x.T * np.sqrt((1.0 - shrinkage) * periods / num_obs)
+    specific = np.full(num_stocks, shrinkage * mu * periods)
+    return FactorCovariance(factors, specific)
+
+def factor_model(daily_returns, num_factors, periods=TRADING_DAYS_PER_MONTH):
+    # Statistical k-factor model: top principal components as factors, residual variance on the diagonal.
+    x = _complete_returns(daily_returns)
+    x = x - x.mean(axis=0)
+    num_obs = x.shape[0]
+    _, singular_values, components = np.linalg.svd(x, full_matrices=False)
+    num_factors = min(num_factors, len(singular_values))
+    scale = np.sqrt(periods / (num_obs - 1))
+    factors = components[:num_factors].T * (singular_values[:num_factors] * scale)
+    total = np.sum(x ** 2, axis=0) * scale ** 2
+    specific = np.maximum(total - np.einsum('ij,ij->i', factors, factors), 1e-12 * total.max())
+    return FactorCovariance(factors, specific)
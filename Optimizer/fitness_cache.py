@@ -0,0 +1,93 @@
+import random
+from collections import OrderedDict
+import numpy as np
+
+class FitnessCache:
+    # Bounded LRU memo of portfolio scores. A portfolio's key is the XOR of 64-bit Zobrist codes of its
+    # stock indexes, so it does not depend on stock order and costs O(k) with no sorting. Portfolios
+    # must hold distinct stocks (a repeated index would cancel out of the key).
+    #
+    # One cache may be shared by optimizers over the same stocks list that use the same score, such as
+    # GeneticAlgorithm and PSO.
+    def __init__(self, num_stocks, max_size=100_000, seed=None):
+        rng = random.Random(seed)
+        self.codes = [rng.getrandbits(64) for _ in range(num_stocks)]
+        self.code_array = np.array(self.codes, dtype=np.uint64)
+        self.max_size = max_size
+        self.scores = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, indexes):
+        key = 0
+        codes = self.codes
+        for i in indexes:
+            key ^= codes[i]
+        return key
+
+    def get(self, indexes, compute, *args):
+        # Cached score for these stock indexes, else compute(*args), stored and returned.
+        key = self.key(indexes)
+        score = self.scores.get(key)
+        if score is not None:
+            self.hits += 1
+            self.scores.move_to_end(key)
+            return score
+        self.misses += 1
+        score = compute(*args)
+        self.scores[key] = score
+        if self.max_size is not None and len(self.scores) > self.max_size:
+            self.scores.popitem(last=False)
+        return score
+
+    def keys(self, matrix):
+        # key() for every row of an index matrix at once.
+        return np.bitwise_xor.reduce(self.code_array[matrix], axis=1).tolist()
+
+    def get_many(self, keys):
+        # Scores for the given keys, NaN where missing, and the boolean mask of the misses.
+        scores = np.full(len(keys), np.nan)
+        for row, key in enumerate(keys):
+            score = self.scores.get(key)
+            if score is not None:
+                scores[row] = score
+                self.scores.move_to_end(key)
+        missing = np.isnan(scores)
+        misses = int(missing.sum())
+        self.hits += len(keys) - misses
+        self.misses += misses
+        return scores, missing
+
+    def put_many(self, keys, scores):
+        for key, score in zip(keys, scores):
+            self.scores[key] = float(score)
+        if self.max_size is not None:
+            while len(self.scores) > self.max_size:
+                self.scores.popitem(last=False)
+
+    def lookups(self):
+        return self.hits, self.misses
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate(), 'size': len(self.scores)}
+
+    def clear(self):
+        self.scores.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.scores)
+
+def count_evaluations(instrumentation, cache, scored, before=None):
+    # Reports a scoring pass of `scored` portfolios. With a cache, only the misses since
+    # before = cache.lookups() were computed ('evaluations') and the rest were 'cache_hits'.
+    if cache is None:
+        instrumentation.count('evaluations', scored)
+        return
+    hits, misses = cache.lookups()
+    instrumentation.count('evaluations', misses - before[1])
+    instrumentation.count('cache_hits', hits - before[0])
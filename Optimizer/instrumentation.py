@@ -0,0 +1,112 @@
+import json
+import time
+from collections import defaultdict
+
+# Opt-in profiling for the optimizer loops. Optimizers take instrumentation=None and then use
+# NULL_INSTRUMENTATION, whose methods do nothing, so the loops pay one no-op call per phase.
+#
+#   inst = Instrumentation(labels={'optimizer': 'vga'})
+#   inst.add_callback(lambda iteration, best_score: print(iteration, best_score))
+#   VectorizedGeneticAlgorithm(stocks, 200, 20, instrumentation=inst).run(100)
+#   print(inst.to_prometheus())
+
+class _Phase:
+    __slots__ = ('instrumentation', 'name', 'start')
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.seconds[self.name] += time.perf_counter() - self.start
+        self.instrumentation.calls[self.name] += 1
+        return False
+
+class Instrumentation:
+    enabled = True
+
+    def __init__(self, labels=None):
+        self.labels = dict(labels or {})
+        self.seconds = defaultdict(float)  # phase -> total time
+        self.calls = defaultdict(int)  # phase -> times entered
+        self.counters = defaultdict(int)  # e.g. evaluations, cache_hits
+        self.history = []  # best score after each iteration
+        self.callbacks = []
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def add_callback(self, callback):
+        # callback(iteration, best_score), called after every generation / iteration / episode.
+        self.callbacks.append(callback)
+
+    def iteration(self, index, best_score):
+        self.history.append(best_score)
+        for callback in self.callbacks:
+            callback(index, best_score)
+
+    def to_dict(self):
+        return {
+            'labels': self.labels,
+            'phases': {name: {'seconds': self.seconds[name], 'calls': self.calls[name]} for name in self.seconds},
+            'counters': dict(self.counters),
+            'iterations': len(self.history),
+            'best_score': self.history[-1] if self.history else None,
+            'history': self.history,
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix='portfolio_optimizer'):
+        def labels(**extra):
+            pairs = {**self.labels, **extra}
+            if not pairs:
+                return ''
+            escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in pairs.values())
+            return '{' + ','.join(f'{k}="{v}"' for k, v in zip(pairs, escaped)) + '}'
+
+        lines = [f"# HELP {prefix}_phase_seconds_total Time spent in each optimizer phase.",
+                 f"# TYPE {prefix}_phase_seconds_total counter"]
+        lines += [f"{prefix}_phase_seconds_total{labels(phase=name)} {value}" for name, value in self.seconds.items()]
+        lines += [f"# HELP {prefix}_phase_calls_total Times each optimizer phase was entered.",
+                  f"# TYPE {prefix}_phase_calls_total counter"]
+        lines += [f"{prefix}_phase_calls_total{labels(phase=name)} {value}" for name, value in self.calls.items()]
+        for name, value in self.counters.items():
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total{labels()} {value}"]
+        lines += [f"# TYPE {prefix}_iterations_total counter", f"{prefix}_iterations_total{labels()} {len(self.history)}"]
+        if self.history:
+            lines += [f"# TYPE {prefix}_best_score gauge", f"{prefix}_best_score{labels()} {self.history[-1]}"]
+        return '\n'.join(lines) + '\n'
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+class NullInstrumentation:
+    # Disabled default. Loops check enabled before computing anything only needed for reporting.
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def count(self, name, amount=1):
+        pass
+
+    def iteration(self, index, best_score):
+        pass
+
+NULL_INSTRUMENTATION = NullInstrumentation()
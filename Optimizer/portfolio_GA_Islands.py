@@ -0,0 +1,98 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from portfolio_GA_New import VectorizedGeneticAlgorithm
+from universe import DEFAULT_UNIVERSE_PATH, Portfolio, load_universe
+
+# Set once per worker process so the universe is not re-sent with every task.
+_worker_stocks = None
+
+def _init_worker(stocks):
+    global _worker_stocks
+    _worker_stocks = stocks
+
+def _evolve_island(settings, population, rng, generations):
+    population_size, portfolio_size, mutation_rate = settings
+    ga = VectorizedGeneticAlgorithm(_worker_stocks, population_size, portfolio_size,
+                                    mutation_rate, seed=rng, population=population)
+    ga.evolve(generations)
+    return ga.population, ga.rng
+
+class IslandModel:
+    def __init__(self, stocks, num_islands, population_size, portfolio_size,
+                 migration_interval=10, migration_size=5, mutation_rate=0.1, seeds=None, max_workers=None):
+        if seeds is None:
+            seeds = np.random.SeedSequence().spawn(num_islands)
+        if len(seeds) != num_islands:
+            raise ValueError(f"Expected {num_islands} island seeds, got {len(seeds)}.")
+        if migration_size >= population_size // 2:
+            raise ValueError("Migration size must be smaller than the surviving half of an island.")
+        self.stocks = stocks
+        self.num_islands = num_islands
+        self.settings = (population_size, portfolio_size, mutation_rate)
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.max_workers = max_workers or min(num_islands, os.cpu_count() or 1)
+        self.islands = [VectorizedGeneticAlgorithm(stocks, population_size, portfolio_size, mutation_rate, seed=seed)
+                        for seed in seeds]
+        self.best_score = -float('inf')
+        self.best_indexes = None
+
+    def migrate(self):
+        # Ring topology: island i sends its top portfolios to island i + 1, replacing the worst.
+        scores = [ga.evaluate_population(ga.population) for ga in self.islands]
+        emigrants = []
+        for ga, island_scores in zip(self.islands, scores):
+            top = np.argpartition(-island_scores, self.migration_size - 1)[:self.migration_size]
+            emigrants.append(ga.population[top].copy())
+        for i, ga in enumerate(self.islands):
+            worst = np.argpartition(scores[i], self.migration_size - 1)[:self.migration_size]
+            ga.population[worst] = emigrants[i - 1]
+            ga.scores = None
+
+    def track_best(self):
+        for ga in self.islands:
+            indexes, score = ga.best()
+            if score > self.best_score:
+                self.best_score = score
+                self.best_indexes = indexes.copy()
+
+    def run(self, generations):
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(self.stocks,)) as pool:
+            remaining = generations
+            while remaining > 0:
+                epoch = min(self.migration_interval, remaining)
+                futures = [pool.submit(_evolve_island, self.settings, ga.population, ga.rng, epoch)
+                           for ga in self.islands]
+                for ga, future in zip(self.islands, futures):
+                    ga.population, ga.rng = future.result()
+                remaining -= epoch
+                self.track_best()
+                if remaining > 0 and self.num_islands > 1:
+                    self.migrate()
+
+        return Portfolio([self.stocks[i] for i in self.best_indexes], self.best_indexes.tolist())
+
+# --- Main program ---
+if __name__ == "__main__":
+    filepath = DEFAULT_UNIVERSE_PATH
+    stocks_data = load_universe(filepath)
+
+    num_islands = int(input("Enter the number of islands: "))
+    population_size = int(input("Enter the population size per island: "))
+    portfolio_size = int(input("Enter the portfolio size: "))
+    generations = int(input("Enter the number of generations: "))
+    migration_interval = int(input("Enter the migration interval (generations): "))
+
+    model = IslandModel(stocks_data, num_islands, population_size, portfolio_size,
+                        migration_interval=migration_interval, seeds=list(range(num_islands)))
+    best_portfolio = model.run(generations)
+
+    print("\nBest Portfolio:")
+    for stock in best_portfolio.stocks:
+        print(stock)
+
+    print(f"\nTotal Value: {best_portfolio.total_value():.2f}")
+    print(f"Average Risk: {best_portfolio.average_risk():.4f}")
+    print(f"Average Return: {best_portfolio.average_return():.4f}")
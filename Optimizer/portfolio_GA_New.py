@@ -1,89 +1,232 @@
-import csv
 import random
-
-class Stock:
-    def __init__(self, name, price_per_stock, risk, monthly_return):
-        self.name = name
-        self.price_per_stock = price_per_stock
-        self.risk = risk
-        self.monthly_return = monthly_return
-
-    def __repr__(self):
-        return f"{self.name} (Price: {self.price_per_stock}, Risk: {self.risk}, Return: {self.monthly_return})"
-
-class Portfolio:
-    def __init__(self, stocks):
-        self.stocks = stocks
-
-    def total_value(self):
-        return sum(stock.price_per_stock for stock in self.stocks)
-
-    def average_risk(self):
-        return sum(stock.risk for stock in self.stocks) / len(self.stocks)
-
-    def average_return(self):
-        return sum(stock.monthly_return for stock in self.stocks) / len(self.stocks)
+import numpy as np
+from convergence import load_checkpoint, save_checkpoint
+from fitness_cache import count_evaluations
+from instrumentation import NULL_INSTRUMENTATION
+from universe import (DEFAULT_UNIVERSE_PATH, Portfolio, as_universe, load_universe, random_portfolios,
+                      repair_duplicates)
 
 class GeneticAlgorithm:
-    def __init__(self, stocks, population_size, portfolio_size):
+    def __init__(self, stocks, population_size, portfolio_size, instrumentation=None, fitness_cache=None):
         self.stocks = stocks
         self.population_size = population_size
         self.portfolio_size = portfolio_size
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.fitness_cache = fitness_cache  # optional FitnessCache; survivors are re-scored every generation
         self.population = self.initialize_population()
 
+    def make_portfolio(self, indexes):
+        return Portfolio([self.stocks[i] for i in indexes], indexes)
+
     def initialize_population(self):
-        return [Portfolio(random.sample(self.stocks, self.portfolio_size)) for _ in range(self.population_size)]
+        return [self.make_portfolio(random.sample(range(len(self.stocks)), self.portfolio_size))
+                for _ in range(self.population_size)]
+
+    def sample_excluding(self, excluded, count):
+        # Rejection sampling: expected O(count) while the excluded set is small next to the universe.
+        seen = set(excluded)
+        chosen = []
+        while len(chosen) < count:
+            i = random.randrange(len(self.stocks))
+            if i not in seen:
+                seen.add(i)
+                chosen.append(i)
+        return chosen
+
+    def compute_fitness(self, portfolio):
+        return portfolio.average_return() / portfolio.average_risk()
 
     def evaluate_portfolio(self, portfolio):
-        return portfolio.average_return() / portfolio.average_risk()
+        if self.fitness_cache is None:
+            return self.compute_fitness(portfolio)
+        return self.fitness_cache.get(portfolio.indexes, self.compute_fitness, portfolio)
 
     def selection(self):
         self.population.sort(key=self.evaluate_portfolio, reverse=True)
         return self.population[:self.population_size // 2]
 
     def crossover(self, parent1, parent2):
-        child_stocks = list(set(parent1.stocks + parent2.stocks))
-        if len(child_stocks) < self.portfolio_size:
-            child_stocks += random.sample([s for s in self.stocks if s not in child_stocks],
-                                          self.portfolio_size - len(child_stocks))
-        return Portfolio(random.sample(child_stocks, self.portfolio_size))
+        # Each parent holds portfolio_size distinct stocks, so the union always has enough to sample from.
+        child_indexes = list(set(parent1.indexes) | set(parent2.indexes))
+        return self.make_portfolio(random.sample(child_indexes, self.portfolio_size))
 
     def mutate(self, portfolio):
-        if random.random() < 0.1:
+        # Returns a new Portfolio so survivors shared with the previous generation are never modified.
+        # A portfolio holding every stock has nothing to swap in and is returned as is.
+        if random.random() < 0.1 and self.portfolio_size < len(self.stocks):
             index = random.randint(0, self.portfolio_size - 1)
-            new_stock = random.choice([s for s in self.stocks if s not in portfolio.stocks])
-            portfolio.stocks[index] = new_stock
-
-    def run(self, generations):
-        for _ in range(generations):
-            selected = self.selection()
-            next_generation = selected[:]
-            while len(next_generation) < self.population_size:
-                parent1, parent2 = random.sample(selected, 2)
-                child = self.crossover(parent1, parent2)
-                self.mutate(child)
-                next_generation.append(child)
+            indexes = portfolio.indexes[:]
+            indexes[index] = self.sample_excluding(indexes, 1)[0]
+            return self.make_portfolio(indexes)
+        return portfolio
+
+    def checkpoint_state(self, generation, monitor=None):
+        return {'generation': generation, 'population': [list(p.indexes) for p in self.population],
+                'random_state': random.getstate(), 'monitor': monitor.state() if monitor else None}
+
+    def restore_checkpoint(self, state, monitor=None):
+        self.population = [self.make_portfolio(indexes) for indexes in state['population']]
+        random.setstate(state['random_state'])
+        if monitor is not None and state['monitor'] is not None:
+            monitor.restore(state['monitor'])
+        return state['generation']
+
+    def run(self, generations, monitor=None, checkpoint_path=None, checkpoint_interval=10):
+        # monitor: optional ConvergenceMonitor for early stopping. With checkpoint_path the state is saved
+        # every checkpoint_interval generations and on exit, and a run finds and resumes from it.
+        inst = self.instrumentation
+        first_generation = 0
+        state = load_checkpoint(checkpoint_path)
+        if state is not None:
+            first_generation = self.restore_checkpoint(state, monitor)
+
+        for generation in range(first_generation, generations):
+            # selection() scores while sorting, so this phase includes the evaluations.
+            before = None if self.fitness_cache is None else self.fitness_cache.lookups()
+            with inst.phase('select'):
+                selected = self.selection()
+            count_evaluations(inst, self.fitness_cache, len(self.population), before)
+            with inst.phase('crossover_mutate'):
+                next_generation = selected[:]
+                while len(next_generation) < self.population_size:
+                    parent1, parent2 = random.sample(selected, 2)
+                    child = self.mutate(self.crossover(parent1, parent2))
+                    next_generation.append(child)
             self.population = next_generation
 
-        return max(self.population, key=self.evaluate_portfolio)
-
-def read_stocks_from_csv(filepath):
-    stocks = []
-    with open(filepath, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            stocks.append(Stock(
-                name=row['CompanyName'],
-                price_per_stock=float(row['PricePerStock']),
-                risk=float(row['Risk']),
-                monthly_return=float(row['MonthlyReturn'])
-            ))
-    return stocks
+            stop = False
+            if inst.enabled or monitor is not None:
+                best_score = self.evaluate_portfolio(selected[0])
+                inst.iteration(generation, best_score)
+                stop = monitor is not None and monitor.update(best_score, len(self.population))
+            if checkpoint_path and (stop or generation + 1 == generations
+                                    or (generation + 1) % checkpoint_interval == 0):
+                save_checkpoint(checkpoint_path, self.checkpoint_state(generation + 1, monitor))
+            if stop:
+                break
+
+        before = None if self.fitness_cache is None else self.fitness_cache.lookups()
+        best = max(self.population, key=self.evaluate_portfolio)
+        count_evaluations(inst, self.fitness_cache, len(self.population), before)
+        return best
+
+class VectorizedGeneticAlgorithm:
+    def __init__(self, stocks, population_size, portfolio_size, mutation_rate=0.1, seed=None, population=None,
+                 instrumentation=None):
+        if portfolio_size > len(stocks):
+            raise ValueError(f"Portfolio size {portfolio_size} is greater than available stocks {len(stocks)}.")
+        self.stocks = stocks
+        self.population_size = population_size
+        self.portfolio_size = portfolio_size
+        self.mutation_rate = mutation_rate
+        self.rng = np.random.default_rng(seed)
+        universe = as_universe(stocks)
+        self.returns = universe.returns
+        self.risks = universe.risks
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.population = self.initialize_population() if population is None else population
+
+    @property
+    def population(self):
+        return self._population
+
+    @population.setter
+    def population(self, population):
+        # scores holds one score per population row, or None when not yet computed. Assigning a new
+        # population clears it; code editing rows in place must reset it or call rescore().
+        self._population = population
+        self.scores = None
+
+    def initialize_population(self):
+        return random_portfolios(self.rng, self.population_size, self.portfolio_size, len(self.stocks))
+
+    def evaluate_population(self, population):
+        # Same ratio as GeneticAlgorithm.evaluate_portfolio; the 1/k factors cancel.
+        return self.returns[population].sum(axis=1) / self.risks[population].sum(axis=1)
+
+    def population_scores(self):
+        if self.scores is None:
+            self.scores = self.evaluate_population(self.population)
+            self.instrumentation.count('evaluations', len(self.population))
+        return self.scores
+
+    def rescore(self, stock_indexes):
+        # After the returns/risks of these stocks changed: re-evaluates only the rows holding one of them.
+        if self.scores is None:
+            return 0
+        rows = np.flatnonzero(np.isin(self.population, stock_indexes).any(axis=1))
+        self.scores[rows] = self.evaluate_population(self.population[rows])
+        self.instrumentation.count('evaluations', len(rows))
+        return len(rows)
+
+    def survivors(self, scores):
+        keep = self.population_size // 2
+        return np.argpartition(-scores, keep - 1)[:keep]
+
+    def selection(self, scores):
+        return self.population[self.survivors(scores)]
+
+    def crossover(self, selected, count):
+        # Two distinct parents per child, like random.sample(selected, 2).
+        first = self.rng.integers(0, len(selected), size=count)
+        second = (first + self.rng.integers(1, len(selected), size=count)) % len(selected)
+        pool = np.concatenate((selected[first], selected[second]), axis=1)
+        pool.sort(axis=1)
+        keys = self.rng.random(pool.shape)
+        keys[:, 1:][pool[:, 1:] == pool[:, :-1]] = np.inf
+        picks = np.argpartition(keys, self.portfolio_size - 1, axis=1)[:, :self.portfolio_size]
+        children = np.take_along_axis(pool, picks, axis=1)
+        # Parents sharing stocks can leave fewer than portfolio_size distinct picks.
+        return repair_duplicates(self.rng, children, len(self.stocks))
+
+    def mutate(self, children):
+        if self.portfolio_size >= len(self.stocks):
+            return children  # every stock is already held: there is nothing to swap in
+        rows = np.flatnonzero(self.rng.random(len(children)) < self.mutation_rate)
+        cols = self.rng.integers(0, self.portfolio_size, size=len(rows))
+        while len(rows):
+            candidates = self.rng.integers(0, len(self.stocks), size=len(rows))
+            clash = (children[rows] == candidates[:, None]).any(axis=1)
+            children[rows[~clash], cols[~clash]] = candidates[~clash]
+            rows, cols = rows[clash], cols[clash]
+        return children
+
+    def evolve(self, generations):
+        inst = self.instrumentation
+        for generation in range(generations):
+            # Survivors keep their scores, so each generation evaluates only its children.
+            with inst.phase('evaluate'):
+                scores = self.population_scores()
+            with inst.phase('select'):
+                keep = self.survivors(scores)
+                selected = self.population[keep]
+            with inst.phase('crossover'):
+                children = self.crossover(selected, self.population_size - len(selected))
+            with inst.phase('mutate'):
+                children = self.mutate(children)
+            with inst.phase('evaluate'):
+                child_scores = self.evaluate_population(children)
+            inst.count('evaluations', len(children))
+            self.population = np.concatenate((selected, children))
+            self.scores = np.concatenate((scores[keep], child_scores))
+            if inst.enabled:
+                inst.iteration(generation, float(scores.max()))
+        return self.population
+
+    def best(self):
+        scores = self.population_scores()
+        best_index = int(np.argmax(scores))
+        return self.population[best_index], float(scores[best_index])
+
+    def run(self, generations):
+        self.evolve(generations)
+        indexes, _ = self.best()
+        return Portfolio([self.stocks[i] for i in indexes], indexes.tolist())
 
 # --- Main program ---
 if __name__ == "__main__":
-    filepath = r"..\data\stocks_data.csv"  # Use raw string for Windows paths
-    stocks_data = read_stocks_from_csv(filepath)
+    filepath = DEFAULT_UNIVERSE_PATH
+    stocks_data = load_universe(filepath)
 
     population_size = int(input("Enter the population size: "))
     portfolio_size = int(input("Enter the portfolio size: "))
@@ -1,83 +1,198 @@
-import csv
 import random
 import numpy as np
-import cvxpy as cp
-
-class Stock:
-    def __init__(self, name, price_per_stock, risk, monthly_return):
-        self.name = name
-        self.price_per_stock = price_per_stock
-        self.risk = risk
-        self.monthly_return = monthly_return
-
-    def __repr__(self):
-        return f"{self.name} (Price: {self.price_per_stock}, Risk: {self.risk}, Return: {self.monthly_return})"
+from covariance import FactorCovariance, sample_covariance
+from universe import DEFAULT_UNIVERSE_PATH, as_universe, load_universe
 
 class Portfolio:
-    def __init__(self, stocks, weights):
+    def __init__(self, stocks, weights, cov_matrix=None):
         self.stocks = stocks
         self.weights = weights  # weights = investment proportions
+        self.cov_matrix = cov_matrix
 
     def total_value(self):
         return sum(stock.price_per_stock for stock in self.stocks)
 
     def average_risk(self):
-        risks = np.array([stock.risk for stock in self.stocks])
-        cov_matrix = np.diag(risks**2)  # Simplified covariance matrix
         w = np.array(self.weights)
-        return np.sqrt(w.T @ cov_matrix @ w)
+        if self.cov_matrix is None:
+            # Simplified (diagonal) covariance matrix, applied without materializing it
+            risks = as_universe(self.stocks).risks
+            return np.sqrt(np.sum((w * risks) ** 2))
+        if isinstance(self.cov_matrix, FactorCovariance):
+            return np.sqrt(self.cov_matrix.variance(w))
+        return np.sqrt(w.T @ self.cov_matrix @ w)
 
     def average_return(self):
-        returns = np.array([stock.monthly_return for stock in self.stocks])
+        returns = as_universe(self.stocks).returns
         w = np.array(self.weights)
         return w.T @ returns
 
+def _min_variance_with_riskless(variances, returns, target_return):
+    # Some stocks have zero variance: holding only the best of them costs no variance, which is optimal
+    # whenever it meets the target. Otherwise, with it held, KKT gives w_j = b * max(0, mu_j - mu_0) / var_j
+    # on the risky stocks; if that leaves it a negative weight it is dropped and the risky stocks alone
+    # are solved.
+    riskless = np.flatnonzero(variances == 0)
+    best = riskless[np.argmax(returns[riskless])]
+    weights = np.zeros(len(returns))
+    if target_return is None or returns[best] >= target_return:
+        weights[best] = 1.0
+        return weights
+    risky = np.flatnonzero(variances > 0)
+    excess = np.maximum(returns[risky] - returns[best], 0.0) / variances[risky]
+    spread = excess @ (returns[risky] - returns[best])
+    if spread > 0 and (target_return - returns[best]) / spread * excess.sum() <= 1.0:
+        weights[risky] = (target_return - returns[best]) / spread * excess
+        weights[best] = 1.0 - weights[risky].sum()
+        return weights
+    if not len(risky):
+        raise ValueError("Optimization failed.")
+    weights[risky] = diagonal_min_variance(variances[risky], returns[risky], target_return)
+    return weights
+
+def diagonal_min_variance(variances, returns, target_return=None):
+    # Long-only minimum variance for a diagonal covariance. KKT gives w_i = max(0, (a + b * mu_i) / var_i)
+    # with b >= 0, so the held stocks are always the top-m by return and a, b solve a 2x2 system.
+    if not variances.all():
+        return _min_variance_with_riskless(variances, returns, target_return)
+    inverse = 1.0 / variances
+    weights = inverse / inverse.sum()
+    if target_return is None or weights @ returns >= target_return:
+        return weights
+
+    order = np.argsort(-returns, kind='stable')
+    mu = returns[order]
+    inv = inverse[order]
+    c1 = np.cumsum(inv)
+    c2 = np.cumsum(mu * inv)
+    c3 = np.cumsum(mu * mu * inv)
+    det = c1 * c3 - c2 * c2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = (c3 - c2 * target_return) / det
+        b = (c1 * target_return - c2) / det
+        tolerance = 1e-12 * (1.0 + np.abs(a) + np.abs(b) * np.abs(mu[0]))
+        last_held = a + b * mu
+        first_dropped = np.append(a[:-1] + b[:-1] * mu[1:], -np.inf)
+        valid = (det > 1e-12 * c1 * c3) & (b >= 0) & (last_held > -tolerance) & (first_dropped <= tolerance)
+
+    weights = np.zeros(len(returns))
+    if valid.any():
+        m = int(np.argmax(valid)) + 1
+        weights[order[:m]] = np.maximum(a[m - 1] + b[m - 1] * mu[:m], 0.0) * inv[:m]
+        return weights / weights.sum()
+    if np.isclose(target_return, mu[0]):
+        # Only the highest-return stock(s) can reach the target.
+        top = order[mu == mu[0]]
+        weights[top] = inverse[top] / inverse[top].sum()
+        return weights
+    raise ValueError("Optimization failed.")
+
+# Interior-point solver retried when the configured one fails (OSQP can stall on targets next to the
+# highest stock return); solver-specific options are not passed to it.
+FALLBACK_SOLVER = 'CLARABEL'
+
 class MarkowitzModel:
-    def __init__(self, stocks):
+    def __init__(self, stocks, cov_matrix=None, solver=None, **solver_options):
         self.stocks = stocks
-
-    def optimize(self):
-        n = len(self.stocks)
-        returns = np.array([s.monthly_return for s in self.stocks])
-        risks = np.array([s.risk for s in self.stocks])
-        cov_matrix = np.diag(risks ** 2)
-
-        weights = cp.Variable(n)
-
-        # Objective: minimize portfolio variance
-        objective = cp.Minimize(cp.quad_form(weights, cov_matrix))
-
-        # Constraints: weights sum to 1, no short selling
+        self.solver = solver  # e.g. "OSQP", which reuses the previous solution on warm starts
+        self.solver_options = solver_options
+        universe = as_universe(stocks)
+        self.returns = universe.returns
+        if cov_matrix is None:
+            self.variances = universe.risks ** 2
+            self.cov_matrix = None
+        elif isinstance(cov_matrix, FactorCovariance):
+            self.variances = cov_matrix.specific_variances if cov_matrix.num_factors == 0 else None
+            self.cov_matrix = cov_matrix
+        else:
+            cov_matrix = np.asarray(cov_matrix, dtype=float)
+            diagonal = np.diagonal(cov_matrix).copy()
+            is_diagonal = not np.any(cov_matrix - np.diag(diagonal))
+            self.variances = diagonal if is_diagonal else None
+            self.cov_matrix = cov_matrix
+        self.problem = None
+
+    def build_problem(self):
+        import cvxpy as cp
+
+        # Built once; the target and expected returns are Parameters so frontier points and updated
+        # returns re-solve without re-canonicalizing.
+        self.weights = cp.Variable(len(self.stocks))
+        self.target_return = cp.Parameter()
+        self.expected_returns = cp.Parameter(len(self.stocks))
+
+        # Constraints: weights sum to 1, no short selling, minimum expected return
         constraints = [
-            cp.sum(weights) == 1,
-            weights >= 0,
+            cp.sum(self.weights) == 1,
+            self.weights >= 0,
+            self.expected_returns @ self.weights >= self.target_return,
         ]
 
-        problem = cp.Problem(objective, constraints)
-        problem.solve()
-
-        if weights.value is None:
+        # Objective: minimize portfolio variance
+        if isinstance(self.cov_matrix, FactorCovariance):
+            # ||F^T w||^2 + sum(d * w^2) through k factor exposures keeps the KKT system sparse.
+            exposures = cp.Variable(self.cov_matrix.num_factors)
+            constraints.append(exposures == self.cov_matrix.factors.T @ self.weights)
+            objective = cp.Minimize(cp.sum_squares(exposures) +
+                                    cp.sum(cp.multiply(self.cov_matrix.specific_variances, cp.square(self.weights))))
+        else:
+            cov_matrix = np.diag(self.variances) if self.cov_matrix is None else self.cov_matrix
+            objective = cp.Minimize(cp.quad_form(self.weights, cp.psd_wrap(cov_matrix)))
+
+        self.problem = cp.Problem(objective, constraints)
+
+    def solve_cvxpy(self, target_return=None, initial_weights=None):
+        import cvxpy as cp
+
+        if self.problem is None:
+            self.build_problem()
+        # A return floor at the lowest stock return never binds, which leaves the minimum-variance problem.
+        self.target_return.value = self.returns.min() if target_return is None else target_return
+        self.expected_returns.value = self.returns
+        if initial_weights is not None:
+            # Starting point for solvers that use one (e.g. OSQP, SCS), such as the previous solution.
+            self.weights.value = np.asarray(initial_weights, dtype=float)
+        self.problem.solve(solver=self.solver, warm_start=True, **self.solver_options)
+        solved = self.weights.value is not None and self.problem.status in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE)
+        if not solved and self.solver != FALLBACK_SOLVER and FALLBACK_SOLVER in cp.installed_solvers():
+            self.problem.solve(solver=FALLBACK_SOLVER)
+            solved = self.weights.value is not None and self.problem.status in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE)
+
+        if not solved:
             raise ValueError("Optimization failed.")
 
-        return Portfolio(self.stocks, weights.value)
-
-def read_stocks_from_csv(filepath):
-    stocks = []
-    with open(filepath, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            stocks.append(Stock(
-                name=row['CompanyName'],
-                price_per_stock=float(row['PricePerStock']),
-                risk=float(row['Risk']),
-                monthly_return=float(row['MonthlyReturn'])
-            ))
-    return stocks
+        return Portfolio(self.stocks, self.weights.value.copy(), self.cov_matrix)
+
+    def solve(self, target_return=None, initial_weights=None):
+        top = np.flatnonzero(self.returns == self.returns.max())
+        if target_return is not None and len(top) == 1 and np.isclose(target_return, self.returns[top[0]]):
+            # Only the highest-return stock reaches the target (the frontier's last point): no solver needed.
+            weights = np.zeros(len(self.returns))
+            weights[top] = 1.0
+            return Portfolio(self.stocks, weights, self.cov_matrix)
+        if self.variances is None:
+            return self.solve_cvxpy(target_return, initial_weights)
+        weights = diagonal_min_variance(self.variances, self.returns, target_return)
+        return Portfolio(self.stocks, weights, self.cov_matrix)
+
+    def refresh(self, stock_indexes):
+        # Re-reads changed stock risks into the simplified diagonal covariance. Returns are read from
+        # the stocks' arrays at every solve; an explicit cov_matrix must be replaced by the caller.
+        if self.cov_matrix is None:
+            self.variances[stock_indexes] = as_universe(self.stocks).risks[stock_indexes] ** 2
+
+    def optimize(self):
+        return self.solve()
+
+    def efficient_frontier(self, num_points):
+        min_variance = self.optimize()
+        targets = np.linspace(min_variance.average_return(), self.returns.max(), num_points)
+        return [self.solve(target) for target in targets]
 
 # --- Main Program ---
 if __name__ == "__main__":
-    filepath = r"..\data\stocks_data.csv"  # Update as needed
-    stocks_data = read_stocks_from_csv(filepath)
+    filepath = DEFAULT_UNIVERSE_PATH
+    stocks_data = load_universe(filepath)
 
     portfolio_size = int(input("Enter the portfolio size: "))
 
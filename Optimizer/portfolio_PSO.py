@@ -1,28 +1,10 @@
-import csv
 import random
-
-class Stock:
-    def __init__(self, name, price_per_stock, risk, monthly_return):
-        self.name = name
-        self.price_per_stock = price_per_stock
-        self.risk = risk
-        self.monthly_return = monthly_return
-
-    def __repr__(self):
-        return f"{self.name} (Price: {self.price_per_stock}, Risk: {self.risk}, Return: {self.monthly_return})"
-
-class Portfolio:
-    def __init__(self, stocks):
-        self.stocks = stocks
-
-    def total_value(self):
-        return sum(stock.price_per_stock for stock in self.stocks)
-
-    def average_risk(self):
-        return sum(stock.risk for stock in self.stocks) / len(self.stocks)
-
-    def average_return(self):
-        return sum(stock.monthly_return for stock in self.stocks) / len(self.stocks)
+import numpy as np
+from convergence import load_checkpoint, save_checkpoint
+from fitness_cache import count_evaluations
+from instrumentation import NULL_INSTRUMENTATION
+from universe import (DEFAULT_UNIVERSE_PATH, Portfolio, as_universe, load_universe, random_portfolios,
+                      repair_duplicates)
 
 class Particle:
     def __init__(self, stocks, portfolio_size):
@@ -34,22 +16,30 @@ class Particle:
         self.best_score = -float('inf')
 
     def get_portfolio(self):
-        return Portfolio([self.stocks[i] for i in self.position])
+        return Portfolio([self.stocks[i] for i in self.position], self.position)
 
 class PSO:
-    def __init__(self, stocks, num_particles, portfolio_size, num_iterations):
+    def __init__(self, stocks, num_particles, portfolio_size, num_iterations, instrumentation=None,
+                 fitness_cache=None):
         self.stocks = stocks
         self.num_particles = num_particles
         self.portfolio_size = portfolio_size
         self.num_iterations = num_iterations
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.fitness_cache = fitness_cache  # optional FitnessCache; particles often revisit positions
         self.swarm = [Particle(stocks, portfolio_size) for _ in range(num_particles)]
         self.global_best_position = None
         self.global_best_score = -float('inf')
 
-    def evaluate(self, portfolio):
+    def compute_fitness(self, portfolio):
         risk = portfolio.average_risk()
         return 0 if risk == 0 else portfolio.average_return() / risk
 
+    def evaluate(self, portfolio):
+        if self.fitness_cache is None or portfolio.indexes is None:
+            return self.compute_fitness(portfolio)
+        return self.fitness_cache.get(portfolio.indexes, self.compute_fitness, portfolio)
+
     def difference(self, a, b):
         swaps = []
         a_set = set(a)
@@ -91,43 +81,164 @@ class PSO:
                     pos[idx] = missing.pop()
         particle.position = pos
 
-    def run(self):
-        for _ in range(self.num_iterations):
-            for particle in self.swarm:
-                portfolio = particle.get_portfolio()
-                score = self.evaluate(portfolio)
+    def checkpoint_state(self, iteration, monitor=None):
+        return {'iteration': iteration,
+                'swarm': [(p.position, p.velocity, p.best_position, p.best_score) for p in self.swarm],
+                'global_best_position': self.global_best_position, 'global_best_score': self.global_best_score,
+                'random_state': random.getstate(), 'monitor': monitor.state() if monitor else None}
+
+    def restore_checkpoint(self, state, monitor=None):
+        for particle, (position, velocity, best_position, best_score) in zip(self.swarm, state['swarm']):
+            particle.position, particle.velocity = position, velocity
+            particle.best_position, particle.best_score = best_position, best_score
+        self.global_best_position = state['global_best_position']
+        self.global_best_score = state['global_best_score']
+        random.setstate(state['random_state'])
+        if monitor is not None and state['monitor'] is not None:
+            monitor.restore(state['monitor'])
+        return state['iteration']
+
+    def run(self, monitor=None, checkpoint_path=None, checkpoint_interval=10):
+        # Early stopping and checkpoint/resume as in GeneticAlgorithm.run.
+        inst = self.instrumentation
+        first_iteration = 0
+        state = load_checkpoint(checkpoint_path)
+        if state is not None:
+            first_iteration = self.restore_checkpoint(state, monitor)
+
+        for iteration in range(first_iteration, self.num_iterations):
+            before = None if self.fitness_cache is None else self.fitness_cache.lookups()
+            with inst.phase('evaluate'):
+                for particle in self.swarm:
+                    portfolio = particle.get_portfolio()
+                    score = self.evaluate(portfolio)
 
-                if score > particle.best_score:
-                    particle.best_score = score
-                    particle.best_position = particle.position[:]
+                    if score > particle.best_score:
+                        particle.best_score = score
+                        particle.best_position = particle.position[:]
 
-                if score > self.global_best_score:
-                    self.global_best_score = score
-                    self.global_best_position = particle.position[:]
+                    if score > self.global_best_score:
+                        self.global_best_score = score
+                        self.global_best_position = particle.position[:]
+            count_evaluations(inst, self.fitness_cache, len(self.swarm), before)
 
-            for particle in self.swarm:
-                self.update_velocity(particle)
-                self.apply_velocity(particle)
+            with inst.phase('velocity_update'):
+                for particle in self.swarm:
+                    self.update_velocity(particle)
+                    self.apply_velocity(particle)
+            inst.iteration(iteration, self.global_best_score)
+
+            stop = monitor is not None and monitor.update(self.global_best_score, len(self.swarm))
+            if checkpoint_path and (stop or iteration + 1 == self.num_iterations
+                                    or (iteration + 1) % checkpoint_interval == 0):
+                save_checkpoint(checkpoint_path, self.checkpoint_state(iteration + 1, monitor))
+            if stop:
+                break
 
         best_stocks = [self.stocks[i] for i in self.global_best_position]
         return Portfolio(best_stocks)
 
-def read_stocks_from_csv(filepath):
-    stocks = []
-    with open(filepath, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            stocks.append(Stock(
-                name=row['CompanyName'],
-                price_per_stock=float(row['PricePerStock']),
-                risk=float(row['Risk']),
-                monthly_return=float(row['MonthlyReturn'])
-            ))
-    return stocks
+class VectorizedPSO:
+    def __init__(self, stocks, num_particles, portfolio_size, num_iterations,
+                 inertia=0.5, cognitive=1.0, social=1.0, seed=None, instrumentation=None):
+        if portfolio_size > len(stocks):
+            raise ValueError(f"Portfolio size {portfolio_size} is greater than available stocks {len(stocks)}.")
+        self.stocks = stocks
+        self.num_particles = num_particles
+        self.portfolio_size = portfolio_size
+        self.num_iterations = num_iterations
+        self.inertia, self.cognitive, self.social = inertia, cognitive, social
+        self.rng = np.random.default_rng(seed)
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        universe = as_universe(stocks)
+        self.returns = universe.returns
+        self.risks = universe.risks
+        # Swarm state: one row per particle. A velocity entry is the stock to swap into that slot, or -1.
+        self.positions = random_portfolios(self.rng, num_particles, portfolio_size, len(stocks))
+        self.velocity = np.full(self.positions.shape, -1, dtype=self.positions.dtype)
+        self.best_positions = self.positions.copy()
+        self.best_scores = np.full(num_particles, -np.inf)
+        self.global_best_position = None
+        self.global_best_score = -float('inf')
+
+    def evaluate(self, positions):
+        risk = self.risks[positions].sum(axis=1)
+        total_return = self.returns[positions].sum(axis=1)
+        return np.divide(total_return, risk, out=np.zeros_like(total_return), where=risk != 0)
+
+    def rescore(self, stock_indexes):
+        # After the returns/risks of these stocks changed: re-evaluates the personal bests holding one of
+        # them and re-derives the global best, which is always the highest personal best.
+        rows = np.flatnonzero(np.isin(self.best_positions, stock_indexes).any(axis=1)
+                              & np.isfinite(self.best_scores))
+        self.best_scores[rows] = self.evaluate(self.best_positions[rows])
+        self.instrumentation.count('evaluations', len(rows))
+        if self.global_best_position is not None:
+            best = int(np.argmax(self.best_scores))
+            self.global_best_score = float(self.best_scores[best])
+            self.global_best_position = self.best_positions[best].copy()
+        return len(rows)
+
+    def difference(self, a, b):
+        # Row-wise PSO.difference: slots of a holding stocks absent from b receive b's missing stocks in order.
+        b = np.broadcast_to(b, a.shape)
+        combined = np.concatenate((a, b), axis=1)
+        order = np.argsort(combined, axis=1, kind='stable')
+        ordered = np.take_along_axis(combined, order, axis=1)
+        shared = np.zeros(combined.shape, dtype=bool)
+        shared[:, 1:] = ordered[:, 1:] == ordered[:, :-1]
+        shared[:, :-1] |= shared[:, 1:]
+        in_both = np.empty_like(shared)
+        np.put_along_axis(in_both, order, shared, axis=1)
+        swaps = np.full(a.shape, -1, dtype=a.dtype)
+        swaps[~in_both[:, :a.shape[1]]] = b[~in_both[:, a.shape[1]:]]
+        return swaps
+
+    def update_velocity(self):
+        shape = self.velocity.shape
+        # Inertia keeps each pending swap with probability w rather than PSO's leading fraction w.
+        keep = (self.velocity >= 0) & (self.rng.random(shape) < self.inertia)
+        velocity = np.where(keep, self.velocity, -1)
+        cognitive = self.difference(self.positions, self.best_positions)
+        take = (cognitive >= 0) & (self.rng.random(shape) < self.cognitive)
+        velocity[take] = cognitive[take]
+        if self.global_best_position is not None:
+            social = self.difference(self.positions, self.global_best_position)
+            take = (social >= 0) & (self.rng.random(shape) < self.social)
+            velocity[take] = social[take]
+        self.velocity = velocity
+
+    def apply_velocity(self):
+        positions = np.where(self.velocity >= 0, self.velocity, self.positions)
+        self.positions = repair_duplicates(self.rng, positions, len(self.stocks))
+
+    def run(self):
+        inst = self.instrumentation
+        for iteration in range(self.num_iterations):
+            with inst.phase('evaluate'):
+                scores = self.evaluate(self.positions)
+            inst.count('evaluations', len(scores))
+
+            improved = scores > self.best_scores
+            self.best_scores[improved] = scores[improved]
+            self.best_positions[improved] = self.positions[improved]
+
+            best = int(np.argmax(scores))
+            if scores[best] > self.global_best_score:
+                self.global_best_score = float(scores[best])
+                self.global_best_position = self.positions[best].copy()
+
+            with inst.phase('velocity_update'):
+                self.update_velocity()
+                self.apply_velocity()
+            inst.iteration(iteration, self.global_best_score)
+
+        best_stocks = [self.stocks[i] for i in self.global_best_position]
+        return Portfolio(best_stocks)
 
 if __name__ == "__main__":
-    filepath = r"..\data\stocks_data.csv"
-    stocks_data = read_stocks_from_csv(filepath)
+    filepath = DEFAULT_UNIVERSE_PATH
+    stocks_data = load_universe(filepath)
 
     num_particles = int(input("Enter the number of particles: "))
     portfolio_size = int(input("Enter the portfolio size: "))
@@ -1,42 +1,95 @@
-import csv
 import random
+from collections import OrderedDict
+import numpy as np
+from convergence import load_checkpoint, save_checkpoint
+from instrumentation import NULL_INSTRUMENTATION
+from universe import DEFAULT_UNIVERSE_PATH, Portfolio, as_universe, load_universe
 
-class Stock:
-    def __init__(self, name, price_per_stock, risk, monthly_return):
-        self.name = name
-        self.price_per_stock = price_per_stock
-        self.risk = risk
-        self.monthly_return = monthly_return
+class BoundedQTable:
+    # Q-values keyed by state hash, capped at max_size entries; the least recently updated state is evicted.
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.values = OrderedDict()
 
-    def __repr__(self):
-        return (f"{self.name} (Price: {self.price_per_stock}, "
-                f"Risk: {self.risk}, Return: {self.monthly_return})")
+    def get(self, key, default=0):
+        return self.values.get(key, default)
 
-class Portfolio:
-    def __init__(self, stocks):
-        self.stocks = stocks
+    def __setitem__(self, key, value):
+        self.values[key] = value
+        self.values.move_to_end(key)
+        if self.max_size is not None and len(self.values) > self.max_size:
+            self.values.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def __len__(self):
+        return len(self.values)
+
+class ArrayQTable:
+    # Q-values in sorted NumPy arrays so whole batches of state keys are looked up with one searchsorted.
+    # Updates are merged in bulk; past max_size the states updated longest ago are dropped.
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.values = np.empty(0, dtype=np.float64)
+        self.stamps = np.empty(0, dtype=np.int64)
+        self.clock = 0
 
-    def total_value(self):
-        return sum(stock.price_per_stock for stock in self.stocks)
+    def __len__(self):
+        return len(self.keys)
 
-    def average_risk(self):
-        return sum(stock.risk for stock in self.stocks) / len(self.stocks)
+    def find(self, keys):
+        positions = np.minimum(np.searchsorted(self.keys, keys), max(len(self.keys) - 1, 0))
+        found = self.keys[positions] == keys if len(self.keys) else np.zeros(np.shape(keys), dtype=bool)
+        return positions, found
 
-    def average_return(self):
-        return sum(stock.monthly_return for stock in self.stocks) / len(self.stocks)
+    def lookup(self, keys):
+        keys = np.asarray(keys, dtype=np.uint64)
+        positions, found = self.find(keys)
+        if not len(self.keys):
+            return np.zeros(keys.shape)
+        return np.where(found, self.values[positions], 0.0)
+
+    def update(self, keys, values):
+        # keys must be unique
+        self.clock += 1
+        keys = np.asarray(keys, dtype=np.uint64)
+        positions, found = self.find(keys)
+        self.values[positions[found]] = values[found]
+        self.stamps[positions[found]] = self.clock
+
+        keys = np.concatenate((self.keys, keys[~found]))
+        values = np.concatenate((self.values, values[~found]))
+        stamps = np.concatenate((self.stamps, np.full(int((~found).sum()), self.clock)))
+        if self.max_size is not None and len(keys) > self.max_size:
+            keep = np.argpartition(-stamps, self.max_size - 1)[:self.max_size]
+            keys, values, stamps = keys[keep], values[keep], stamps[keep]
+        order = np.argsort(keys)
+        self.keys, self.values, self.stamps = keys[order], values[order], stamps[order]
 
 class ReinforcementLearner:
-    def __init__(self, stocks, portfolio_size, episodes):
+    def __init__(self, stocks, portfolio_size, episodes, max_q_states=1_000_000, instrumentation=None):
         self.stocks = stocks
         self.portfolio_size = portfolio_size
         self.episodes = episodes
-        self.q_table = {}
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        # No FitnessCache here: learn() and learn_batched() score each step in O(1) from running sums,
+        # which is cheaper than a memo lookup.
+        self.q_table = BoundedQTable(max_q_states)
         self.epsilon = 0.2
         self.alpha = 0.1
         self.gamma = 0.9
+        # Zobrist hashing: a state's key is the XOR of its stocks' random 64-bit codes, so adding a
+        # stock updates the key in O(1) and the order stocks were picked in does not matter.
+        self.zobrist = [random.getrandbits(64) for _ in stocks]
+        self.array_q_table = ArrayQTable(max_q_states)
 
     def get_state_key(self, selected_indexes):
-        return tuple(sorted(selected_indexes))
+        key = 0
+        for i in selected_indexes:
+            key ^= self.zobrist[i]
+        return key
 
     def get_possible_actions(self, current_indexes):
         return [i for i in range(len(self.stocks)) if i not in current_indexes]
@@ -44,78 +97,189 @@ class ReinforcementLearner:
     def reward(self, portfolio):
         return portfolio.average_return() / (portfolio.average_risk() + 1e-6)
 
-    def learn(self):
-        best_portfolio = None
+    def reward_from_sums(self, total_return, total_risk, count):
+        # Same value as reward() for a portfolio whose stock returns and risks sum to these totals.
+        return (total_return / count) / (total_risk / count + 1e-6)
+
+    def best_next(self, state_key, chosen):
+        # Highest Q-value over the states reachable by adding one unchosen stock, as (q, action).
+        get = self.q_table.get
+        zobrist = self.zobrist
+        best_q, best_action = None, None
+        for a in range(len(self.stocks)):
+            if a in chosen:
+                continue
+            q = get(state_key ^ zobrist[a], 0)
+            if best_q is None or q > best_q:
+                best_q, best_action = q, a
+        return best_q, best_action
+
+    def random_action(self, chosen):
+        while True:
+            a = random.randrange(len(self.stocks))
+            if a not in chosen:
+                return a
+
+    def checkpoint_state(self, episode, best_indexes, best_reward, monitor=None):
+        # The Zobrist codes are saved with the table because the Q-table keys are built from them.
+        return {'episode': episode, 'q_table': self.q_table, 'zobrist': self.zobrist,
+                'best_indexes': best_indexes, 'best_reward': best_reward,
+                'random_state': random.getstate(), 'monitor': monitor.state() if monitor else None}
+
+    def restore_checkpoint(self, state, monitor=None):
+        self.q_table = state['q_table']
+        self.zobrist = state['zobrist']
+        random.setstate(state['random_state'])
+        if monitor is not None and state['monitor'] is not None:
+            monitor.restore(state['monitor'])
+        return state['episode'], state['best_indexes'], state['best_reward']
+
+    def learn(self, monitor=None, checkpoint_path=None, checkpoint_interval=100):
+        # Early stopping and checkpoint/resume as in GeneticAlgorithm.run, counted in episodes.
+        inst = self.instrumentation
+        first_episode = 0
+        best_indexes = None
         best_reward = float('-inf')
+        state = load_checkpoint(checkpoint_path)
+        if state is not None:
+            first_episode, best_indexes, best_reward = self.restore_checkpoint(state, monitor)
 
-        for _ in range(self.episodes):
+        for episode in range(first_episode, self.episodes):
             current_indexes = []
+            chosen = set()
+            state_key = 0
+            total_return = total_risk = 0.0
+            # The greedy choice for this step is also the future_q of the previous update, so it is computed once.
+            with inst.phase('lookahead'):
+                next_q, next_action = self.best_next(state_key, chosen)
 
             for _ in range(self.portfolio_size):
-                state_key = self.get_state_key(current_indexes)
-                possible_actions = self.get_possible_actions(current_indexes)
-
-                if not possible_actions:
+                if next_action is None:
                     break
 
                 if random.random() < self.epsilon:
-                    action = random.choice(possible_actions)
+                    action = self.random_action(chosen)
                 else:
-                    q_values = [
-                        (self.q_table.get(self.get_state_key(current_indexes + [a]), 0), a)
-                        for a in possible_actions
-                    ]
-                    action = max(q_values, key=lambda x: x[0])[1] if q_values else random.choice(possible_actions)
+                    action = next_action
 
                 current_indexes.append(action)
+                chosen.add(action)
+                stock = self.stocks[action]
+                total_return += stock.monthly_return
+                total_risk += stock.risk
 
                 # Update Q-table
-                portfolio = Portfolio([self.stocks[i] for i in current_indexes])
-                current_reward = self.reward(portfolio)
-
-                next_state_key = self.get_state_key(current_indexes)
-                old_q = self.q_table.get(state_key, 0)
-                future_q = max(
-                    [self.q_table.get(self.get_state_key(current_indexes + [a]), 0)
-                     for a in self.get_possible_actions(current_indexes)],
-                    default=0
-                )
+                current_reward = self.reward_from_sums(total_return, total_risk, len(current_indexes))
 
-                self.q_table[state_key] = old_q + self.alpha * (current_reward + self.gamma * future_q - old_q)
+                next_state_key = state_key ^ self.zobrist[action]
+                with inst.phase('lookahead'):
+                    next_q, next_action = self.best_next(next_state_key, chosen)
+                future_q = 0 if next_q is None else next_q
+                with inst.phase('q_update'):
+                    old_q = self.q_table.get(state_key, 0)
+                    self.q_table[state_key] = old_q + self.alpha * (current_reward + self.gamma * future_q - old_q)
+                state_key = next_state_key
 
             # Evaluate final portfolio of the episode
-            final_portfolio = Portfolio([self.stocks[i] for i in current_indexes])
-            final_reward = self.reward(final_portfolio)
+            if current_indexes:
+                final_reward = self.reward_from_sums(total_return, total_risk, len(current_indexes))
+                if final_reward > best_reward:
+                    best_indexes = current_indexes
+                    best_reward = final_reward
+            inst.count('evaluations', len(current_indexes) + 1)
+            inst.iteration(episode, best_reward)
 
-            if final_reward > best_reward:
-                best_portfolio = final_portfolio
-                best_reward = final_reward
+            stop = monitor is not None and monitor.update(best_reward, len(current_indexes) + 1)
+            if checkpoint_path and (stop or episode + 1 == self.episodes
+                                    or (episode + 1) % checkpoint_interval == 0):
+                save_checkpoint(checkpoint_path,
+                                self.checkpoint_state(episode + 1, best_indexes, best_reward, monitor))
+            if stop:
+                break
 
-        return best_portfolio
+        return Portfolio([self.stocks[i] for i in best_indexes], best_indexes) if best_indexes is not None else None
 
-def read_stocks_from_csv(filepath):
-    stocks = []
-    try:
-        with open(filepath, mode='r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                try:
-                    stocks.append(Stock(
-                        name=row['CompanyName'],
-                        price_per_stock=float(row['PricePerStock']),
-                        risk=float(row['Risk']),
-                        monthly_return=float(row['MonthlyReturn'])
-                    ))
-                except ValueError:
-                    pass
-    except FileNotFoundError:
-        print(f"CSV file not found: {filepath}")
-    return stocks
+    def learn_batched(self, batch_size=256, seed=None):
+        # Runs episodes in lockstep batches against array_q_table. Within a batch every episode reads
+        # the table as it stood at the start of the batch; the TD targets are merged afterwards, with
+        # targets for a state visited by several episodes averaged.
+        rng = np.random.default_rng(seed)
+        num_stocks = len(self.stocks)
+        steps = min(self.portfolio_size, num_stocks)
+        universe = as_universe(self.stocks)
+        returns, risks = universe.returns, universe.risks
+        zobrist = np.array(self.zobrist, dtype=np.uint64)
+        table = self.array_q_table
+
+        inst = self.instrumentation
+        best_indexes = None
+        best_reward = float('-inf')
+        remaining = self.episodes
+        batch = 0
+        while remaining > 0 and steps > 0:
+            size = min(batch_size, remaining)
+            remaining -= size
+            rows = np.arange(size)
+            chosen = np.zeros((size, num_stocks), dtype=bool)
+            picks = np.empty((size, steps), dtype=np.int64)
+            state = np.zeros(size, dtype=np.uint64)
+            total_return = np.zeros(size)
+            total_risk = np.zeros(size)
+            update_keys, update_targets = [], []
+            with inst.phase('lookahead'):
+                next_q = np.where(chosen, -np.inf, table.lookup(state[:, None] ^ zobrist))
+
+            for step in range(steps):
+                action = np.argmax(next_q, axis=1)
+                explore = np.flatnonzero(rng.random(size) < self.epsilon)
+                random_actions = rng.integers(0, num_stocks, size=len(explore))
+                clash = chosen[explore, random_actions]
+                while clash.any():
+                    random_actions[clash] = rng.integers(0, num_stocks, size=int(clash.sum()))
+                    clash = chosen[explore, random_actions]
+                action[explore] = random_actions
+
+                picks[:, step] = action
+                chosen[rows, action] = True
+                total_return += returns[action]
+                total_risk += risks[action]
+                reward = (total_return / (step + 1)) / (total_risk / (step + 1) + 1e-6)
+
+                next_state = state ^ zobrist[action]
+                with inst.phase('lookahead'):
+                    if step + 1 < num_stocks:
+                        next_q = np.where(chosen, -np.inf, table.lookup(next_state[:, None] ^ zobrist))
+                        future_q = next_q.max(axis=1)
+                    else:
+                        future_q = np.zeros(size)
+                old_q = table.lookup(state)
+                update_keys.append(state)
+                update_targets.append(old_q + self.alpha * (reward + self.gamma * future_q - old_q))
+                state = next_state
+
+            with inst.phase('q_update'):
+                keys, inverse = np.unique(np.concatenate(update_keys), return_inverse=True)
+                targets = np.bincount(inverse, weights=np.concatenate(update_targets)) / np.bincount(inverse)
+                table.update(keys, targets)
+            inst.count('evaluations', size * steps)
+
+            best = int(np.argmax(reward))
+            if reward[best] > best_reward:
+                best_reward = float(reward[best])
+                best_indexes = picks[best].tolist()
+            inst.iteration(batch, best_reward)
+            batch += 1
+
+        return Portfolio([self.stocks[i] for i in best_indexes], best_indexes) if best_indexes is not None else None
 
 # --- Main ---
 if __name__ == "__main__":
-    filepath = r"..\data\stocks_data.csv"  # Update as needed
-    stocks_data = read_stocks_from_csv(filepath)
+    filepath = DEFAULT_UNIVERSE_PATH
+    try:
+        stocks_data = load_universe(filepath)
+    except FileNotFoundError:
+        print(f"CSV file not found: {filepath}")
+        stocks_data = []
 
     if not stocks_data:
         print("No valid stock data found.")
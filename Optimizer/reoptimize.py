@@ -0,0 +1,66 @@
+import time
+import numpy as np
+from portfolio_GA_New import VectorizedGeneticAlgorithm
+from portfolio_MARKOVITZ import MarkowitzModel
+from portfolio_PSO import VectorizedPSO
+from universe import StockUniverse
+
+class ReoptimizationService:
+    # Long-running re-optimization: the GA population, PSO swarm and Markowitz weights stay in memory.
+    # update() writes changed stock figures into the shared arrays and re-scores only the GA rows and
+    # PSO personal bests holding a changed stock; reoptimize() then continues from that state for a
+    # few generations / iterations and re-solves Markowitz from the previous weights.
+    #
+    # Tickers not in the initial universe are ignored: the arrays are fixed-size so the optimizers'
+    # stock indexes stay valid.
+    def __init__(self, stocks, portfolio_size, population_size=200, num_particles=100, generations=20,
+                 iterations=20, target_return=None, seed=None, solver=None, **solver_options):
+        source = stocks if isinstance(stocks, StockUniverse) else StockUniverse.from_stocks(stocks)
+        # A private, writable copy (a cache-backed universe is a read-only memory map).
+        self.universe = StockUniverse(list(source.names), source.prices.copy(), source.risks.copy(),
+                                      source.returns.copy())
+        self.index_of = {name: i for i, name in enumerate(self.universe.names)}
+        self.generations = generations
+        self.iterations = iterations
+        self.target_return = target_return
+        rng = np.random.default_rng(seed)
+        self.ga = VectorizedGeneticAlgorithm(self.universe, population_size, portfolio_size, seed=rng)
+        self.pso = VectorizedPSO(self.universe, num_particles, portfolio_size, iterations, seed=rng)
+        self.markowitz = MarkowitzModel(self.universe, solver=solver, **solver_options)
+        self.weights = None
+        self.results = {}
+
+    def update(self, changes):
+        # changes: ticker -> {'price_per_stock', 'monthly_return', 'risk'}, as PriceStream publishes them.
+        # Figures that are not all finite (e.g. a ticker with too few returns for a risk) are skipped and
+        # the stock keeps its previous values.
+        indexes = [self.index_of[ticker] for ticker, figures in changes.items()
+                   if ticker in self.index_of
+                   and np.isfinite([figures['price_per_stock'], figures['monthly_return'], figures['risk']]).all()]
+        for i in indexes:
+            figures = changes[self.universe.names[i]]
+            self.universe.prices[i] = figures['price_per_stock']
+            self.universe.returns[i] = figures['monthly_return']
+            self.universe.risks[i] = figures['risk']
+        indexes = np.array(indexes, dtype=np.int64)
+        if len(indexes):
+            self.ga.rescore(indexes)
+            self.pso.rescore(indexes)
+            self.markowitz.refresh(indexes)
+        return indexes
+
+    def reoptimize(self):
+        start = time.perf_counter()
+        ga_portfolio = self.ga.run(self.generations)
+        self.pso.num_iterations = self.iterations
+        pso_portfolio = self.pso.run()
+        markowitz_portfolio = self.markowitz.solve(self.target_return, self.weights)
+        self.weights = markowitz_portfolio.weights
+        self.results = {'ga': ga_portfolio, 'pso': pso_portfolio, 'markowitz': markowitz_portfolio,
+                        'seconds': time.perf_counter() - start}
+        return self.results
+
+    def on_prices(self, changes):
+        # PriceStream subscriber: stream.subscribe(service.on_prices)
+        if len(self.update(changes)):
+            self.reoptimize()
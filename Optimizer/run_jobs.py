@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# A job file holds one JSON object per line, e.g.
+#   {"id": "ga-1", "algorithm": "vga", "seed": 7, "universe": "../data/stocks_data.csv",
+#    "params": {"population_size": 200, "portfolio_size": 20, "generations": 50}}
+# "universe" is a CSV path (default: data/stocks_data.csv) or {"synthetic": num_stocks, "seed": s}.
+# Each finished job is written as one JSON line as soon as it completes, in completion order.
+#
+# numpy and the optimizer modules are imported by the functions that run a job, so importing this
+# module (e.g. for read_jobs in a worker client) stays cheap; worker.py imports them once up front.
+OPTIMIZER_MODULES = ['numpy', 'universe', 'portfolio_GA_New', 'portfolio_GA_Islands', 'portfolio_PSO',
+                     'portfolio_Reinforcement', 'portfolio_MARKOVITZ', 'weighted_subsets']
+
+def run_ga(stocks, params, seed):
+    from portfolio_GA_New import GeneticAlgorithm
+    return GeneticAlgorithm(stocks, params['population_size'], params['portfolio_size']).run(params['generations'])
+
+def run_vga(stocks, params, seed):
+    from portfolio_GA_New import VectorizedGeneticAlgorithm
+    return VectorizedGeneticAlgorithm(stocks, params['population_size'], params['portfolio_size'],
+                                      mutation_rate=params.get('mutation_rate', 0.1),
+                                      seed=seed).run(params['generations'])
+
+def run_islands(stocks, params, seed):
+    from portfolio_GA_Islands import IslandModel
+    num_islands = params['num_islands']
+    seeds = None if seed is None else [seed + i for i in range(num_islands)]
+    model = IslandModel(stocks, num_islands, params['population_size'], params['portfolio_size'],
+                        migration_interval=params.get('migration_interval', 10),
+                        migration_size=params.get('migration_size', 5),
+                        mutation_rate=params.get('mutation_rate', 0.1),
+                        seeds=seeds, max_workers=params.get('max_workers', 1))
+    return model.run(params['generations'])
+
+def run_pso(stocks, params, seed):
+    from portfolio_PSO import PSO
+    return PSO(stocks, params['num_particles'], params['portfolio_size'], params['num_iterations']).run()
+
+def run_vpso(stocks, params, seed):
+    from portfolio_PSO import VectorizedPSO
+    return VectorizedPSO(stocks, params['num_particles'], params['portfolio_size'], params['num_iterations'],
+                         inertia=params.get('inertia', 0.5), cognitive=params.get('cognitive', 1.0),
+                         social=params.get('social', 1.0), seed=seed).run()
+
+def run_rl(stocks, params, seed):
+    from portfolio_Reinforcement import ReinforcementLearner
+    rl = ReinforcementLearner(stocks, params['portfolio_size'], params['episodes'],
+                              max_q_states=params.get('max_q_states', 1_000_000))
+    if params.get('batch_size'):
+        return rl.learn_batched(params['batch_size'], seed=seed)
+    return rl.learn()
+
+def run_markowitz(stocks, params, seed):
+    from portfolio_MARKOVITZ import MarkowitzModel
+    portfolio_size = params.get('portfolio_size')
+    if portfolio_size is not None:
+        stocks = random.sample(stocks, min(portfolio_size, len(stocks)))
+    return MarkowitzModel(stocks).solve(params.get('target_return'))
+
+def run_weighted_ga(stocks, params, seed):
+    from weighted_subsets import RISK_AVERSION, WeightedSubsetGA
+    solver = get_solver(stocks, params.get('risk_aversion', RISK_AVERSION))
+    return WeightedSubsetGA(stocks, params['population_size'], params['portfolio_size'], solver=solver,
+                            mutation_rate=params.get('mutation_rate', 0.1), seed=seed).run(params['generations'])
+
+def run_weighted_pso(stocks, params, seed):
+    from weighted_subsets import RISK_AVERSION, WeightedSubsetPSO
+    solver = get_solver(stocks, params.get('risk_aversion', RISK_AVERSION))
+    return WeightedSubsetPSO(stocks, params['num_particles'], params['portfolio_size'], params['num_iterations'],
+                             solver=solver, seed=seed).run()
+
+ALGORITHMS = {
+    'ga': run_ga,
+    'vga': run_vga,
+    'islands': run_islands,
+    'pso': run_pso,
+    'vpso': run_vpso,
+    'rl': run_rl,
+    'markowitz': run_markowitz,
+    'weighted_ga': run_weighted_ga,
+    'weighted_pso': run_weighted_pso,
+}
+
+# Universes already opened by this worker process, keyed by their job-file spec.
+_universes = {}
+
+def get_universe(spec):
+    from universe import DEFAULT_UNIVERSE_PATH, load_universe, synthetic_universe
+    key = json.dumps(spec, sort_keys=True)
+    if key not in _universes:
+        if isinstance(spec, dict):
+            _universes[key] = synthetic_universe(spec['synthetic'], seed=spec.get('seed'))
+        else:
+            _universes[key] = load_universe(spec or DEFAULT_UNIVERSE_PATH)
+    return _universes[key]
+
+# Subset-weight solvers for those universes, so their memoized subset scores carry over between jobs.
+_solvers = {}
+
+def get_solver(stocks, risk_aversion):
+    from weighted_subsets import SubsetWeightSolver
+    key = (id(stocks), risk_aversion)
+    if key in _solvers:
+        return _solvers[key]
+    solver = SubsetWeightSolver(stocks, risk_aversion=risk_aversion)
+    # Only universes held in _universes are kept: any other object's id may be reused once it is freed.
+    if any(stocks is universe for universe in _universes.values()):
+        _solvers[key] = solver
+    return solver
+
+def summarize(portfolio):
+    if portfolio is None:
+        return {}
+    result = {
+        'stocks': [stock.name for stock in portfolio.stocks],
+        'total_value': float(portfolio.total_value()),
+        'average_risk': float(portfolio.average_risk()),
+        'average_return': float(portfolio.average_return()),
+    }
+    if hasattr(portfolio, 'weights'):
+        result['weights'] = [float(w) for w in portfolio.weights]
+    return result
+
+def seed_generators(seed):
+    # The classic optimizers (GA, PSO, RL, random Markowitz samples) draw from the global generators.
+    import numpy as np
+    random.seed(seed)
+    np.random.seed(None if seed is None else seed % 2 ** 32)
+
+def run_job(job):
+    # Never raises: failures are reported in the result line so one bad job cannot stop a sweep.
+    result = {'id': job.get('id'), 'algorithm': job.get('algorithm'), 'seed': job.get('seed')}
+    start = time.perf_counter()
+    try:
+        seed = job.get('seed')
+        seed_generators(seed)
+        algorithm = ALGORITHMS.get(job.get('algorithm'))
+        if algorithm is None:
+            raise ValueError(f"Unknown algorithm {job.get('algorithm')!r}; expected one of {sorted(ALGORITHMS)}.")
+        result.update(summarize(algorithm(get_universe(job.get('universe')), job.get('params', {}), seed)))
+        result['status'] = 'ok'
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def read_jobs(filepath):
+    jobs = []
+    with open(filepath, encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            job = json.loads(line)
+            job.setdefault('id', line_number)
+            jobs.append(job)
+    return jobs
+
+def run_jobs(jobs, output, max_workers=None):
+    # Streams results to output (a text file object) as they finish; returns the number of failed jobs.
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            failures += result['status'] != 'ok'
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    return failures
+
+# --- Main program ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a file of portfolio optimization jobs in parallel.")
+    parser.add_argument('jobs', help="JSON-lines job file")
+    parser.add_argument('-o', '--output', help="JSON-lines result file (default: stdout)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help="worker processes")
+    args = parser.parse_args()
+
+    jobs = read_jobs(args.jobs)
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as output:
+            failures = run_jobs(jobs, output, args.workers)
+    else:
+        failures = run_jobs(jobs, sys.stdout, args.workers)
+    print(f"{len(jobs) - failures}/{len(jobs)} jobs succeeded.", file=sys.stderr)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,259 @@
+import csv
+import hashlib
+import json
+import os
+from collections.abc import Sequence
+import numpy as np
+
+# data/stocks_data.csv, resolved from this file so scripts work from any working directory.
+DEFAULT_UNIVERSE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'stocks_data.csv')
+
+class Stock:
+    # A view of one row of a StockUniverse; the values live in the universe's arrays.
+    __slots__ = ('universe', 'index')
+
+    def __init__(self, universe, index):
+        self.universe = universe
+        self.index = index
+
+    @property
+    def name(self):
+        return self.universe.names[self.index]
+
+    @property
+    def price_per_stock(self):
+        return float(self.universe.prices[self.index])
+
+    @property
+    def risk(self):
+        return float(self.universe.risks[self.index])
+
+    @property
+    def monthly_return(self):
+        return float(self.universe.returns[self.index])
+
+    def __eq__(self, other):
+        return isinstance(other, Stock) and self.universe is other.universe and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.universe), self.index))
+
+    def __repr__(self):
+        return f"{self.name} (Price: {self.price_per_stock}, Risk: {self.risk}, Return: {self.monthly_return})"
+
+class NameTable(Sequence):
+    # Names stored as one UTF-8 blob plus an offset table; a name is decoded only when accessed.
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("name index out of range")
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+    @classmethod
+    def from_names(cls, names):
+        encoded = [name.encode('utf-8') for name in names]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+class StockUniverse(Sequence):
+    # Struct-of-arrays stock universe. Indexing yields Stock views, so it can be passed anywhere a list
+    # of stocks was expected, while vectorized code reads the arrays directly.
+    def __init__(self, names, prices, risks, returns):
+        self.names = names if isinstance(names, NameTable) else list(names)
+        self.prices = np.ascontiguousarray(prices, dtype=np.float64)
+        self.risks = np.ascontiguousarray(risks, dtype=np.float64)
+        self.returns = np.ascontiguousarray(returns, dtype=np.float64)
+        self.cache_path = None  # set when the arrays are memory-mapped from a universe cache
+
+    def __reduce__(self):
+        # A cached universe is sent to worker processes by path; each maps the same file.
+        if self.cache_path is not None:
+            return (open_universe_cache, (self.cache_path,))
+        return (StockUniverse, (self.names, self.prices, self.risks, self.returns))
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Stock(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("stock index out of range")
+        return Stock(self, index)
+
+    def subset(self, indexes):
+        indexes = np.asarray(indexes, dtype=np.int64)
+        return StockUniverse([self.names[i] for i in indexes], self.prices[indexes],
+                             self.risks[indexes], self.returns[indexes])
+
+    @classmethod
+    def from_stocks(cls, stocks):
+        stocks = list(stocks)
+        return cls([s.name for s in stocks], [s.price_per_stock for s in stocks],
+                   [s.risk for s in stocks], [s.monthly_return for s in stocks])
+
+def as_universe(stocks):
+    # Zero-copy for a StockUniverse, one gather for views into a single universe, otherwise built from attributes.
+    if isinstance(stocks, StockUniverse):
+        return stocks
+    stocks = list(stocks)
+    if stocks and all(isinstance(s, Stock) for s in stocks):
+        universe = stocks[0].universe
+        if all(s.universe is universe for s in stocks):
+            return universe.subset([s.index for s in stocks])
+    return StockUniverse.from_stocks(stocks)
+
+class Portfolio:
+    def __init__(self, stocks, indexes=None):
+        self.stocks = stocks
+        self.indexes = indexes
+
+    def total_value(self):
+        return sum(stock.price_per_stock for stock in self.stocks)
+
+    def average_risk(self):
+        return sum(stock.risk for stock in self.stocks) / len(self.stocks)
+
+    def average_return(self):
+        return sum(stock.monthly_return for stock in self.stocks) / len(self.stocks)
+
+def repair_duplicates(rng, matrix, num_stocks):
+    # Redraw repeated stocks in place; the first occurrence in each row keeps its slot.
+    while True:
+        order = np.argsort(matrix, axis=1, kind='stable')
+        ordered = np.take_along_axis(matrix, order, axis=1)
+        repeated = np.zeros(matrix.shape, dtype=bool)
+        repeated[:, 1:] = ordered[:, 1:] == ordered[:, :-1]
+        rows, cols = np.nonzero(repeated)
+        if not len(rows):
+            return matrix
+        matrix[rows, order[rows, cols]] = rng.integers(0, num_stocks, size=len(rows))
+
+def random_portfolios(rng, count, portfolio_size, num_stocks):
+    # count rows of portfolio_size distinct stock indexes each.
+    if 2 * portfolio_size > num_stocks:
+        keys = rng.random((count, num_stocks))
+        return np.argpartition(keys, portfolio_size - 1, axis=1)[:, :portfolio_size]
+    matrix = rng.integers(0, num_stocks, size=(count, portfolio_size))
+    return repair_duplicates(rng, matrix, num_stocks)
+
+def synthetic_universe(num_stocks, seed=None):
+    rng = np.random.default_rng(seed)
+    return StockUniverse([f"SYN{i}" for i in range(num_stocks)],
+                         rng.uniform(5, 500, num_stocks),
+                         rng.uniform(0.02, 0.3, num_stocks),
+                         rng.uniform(-0.05, 0.1, num_stocks))
+
+def read_stocks_from_csv(filepath):
+    # Rows with unparseable numbers are skipped.
+    names, prices, risks, returns = [], [], [], []
+    with open(filepath, mode='r', newline='', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            try:
+                price, risk, monthly_return = (float(row['PricePerStock']), float(row['Risk']),
+                                               float(row['MonthlyReturn']))
+            except ValueError:
+                continue
+            names.append(row['CompanyName'])
+            prices.append(price)
+            risks.append(risk)
+            returns.append(monthly_return)
+    return StockUniverse(names, prices, risks, returns)
+
+# --- Binary universe cache ---
+# <csv>.universe holds a JSON header (source size/mtime/SHA-256 and array offsets) followed by the price,
+# risk and return arrays and the name offset table and blob. load_universe() memory-maps the arrays, so
+# every process opening the same cache shares the pages and start-up does no parsing.
+CACHE_MAGIC = b'STKUNIV1'
+CACHE_ALIGNMENT = 64
+
+def _file_digest(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _read_cache_header(cache_path):
+    with open(cache_path, 'rb') as file:
+        if file.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+            return None
+        header_size = int.from_bytes(file.read(8), 'little')
+        return json.loads(file.read(header_size))
+
+def write_universe_cache(universe, cache_path, source_path):
+    stat = os.stat(source_path)
+    names = universe.names if isinstance(universe.names, NameTable) else NameTable.from_names(universe.names)
+    arrays = {'prices': universe.prices, 'risks': universe.risks, 'returns': universe.returns,
+              'name_offsets': names.offsets, 'name_blob': names.blob}
+    header = {'count': len(universe), 'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns,
+              'source_sha256': _file_digest(source_path), 'arrays': {}}
+    # Offsets depend on the header length, so reserve a generous fixed-size header block.
+    data_start = CACHE_ALIGNMENT * 64
+    offset = data_start
+    for key, array in arrays.items():
+        header['arrays'][key] = {'offset': offset, 'dtype': array.dtype.str, 'length': len(array)}
+        offset += -(-array.nbytes // CACHE_ALIGNMENT) * CACHE_ALIGNMENT
+    encoded = json.dumps(header).encode('utf-8')
+    if len(CACHE_MAGIC) + 8 + len(encoded) > data_start:
+        raise ValueError("Universe cache header too large.")
+
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(CACHE_MAGIC + len(encoded).to_bytes(8, 'little') + encoded)
+        for key, array in arrays.items():
+            file.seek(header['arrays'][key]['offset'])
+            file.write(np.ascontiguousarray(array).tobytes())
+        file.truncate(offset)
+    os.replace(tmp_path, cache_path)
+
+def open_universe_cache(cache_path):
+    header = _read_cache_header(cache_path)
+    arrays = {}
+    for key, spec in header['arrays'].items():
+        if spec['length']:
+            arrays[key] = np.memmap(cache_path, dtype=np.dtype(spec['dtype']), mode='r',
+                                    offset=spec['offset'], shape=(spec['length'],))
+        else:
+            arrays[key] = np.empty(0, dtype=np.dtype(spec['dtype']))
+    names = NameTable(arrays['name_offsets'], arrays['name_blob'])
+    universe = StockUniverse(names, arrays['prices'], arrays['risks'], arrays['returns'])
+    universe.cache_path = cache_path
+    return universe
+
+def _cache_is_fresh(cache_path, source_path):
+    try:
+        header = _read_cache_header(cache_path)
+    except (OSError, ValueError):
+        return False
+    if header is None:
+        return False
+    stat = os.stat(source_path)
+    if header['source_size'] == stat.st_size and header['source_mtime_ns'] == stat.st_mtime_ns:
+        return True
+    # Touched but possibly unchanged: only then is the source hashed.
+    return header['source_size'] == stat.st_size and header['source_sha256'] == _file_digest(source_path)
+
+def load_universe(filepath, cache_path=None):
+    cache_path = cache_path or f"{filepath}.universe"
+    if not _cache_is_fresh(cache_path, filepath):
+        universe = read_stocks_from_csv(filepath)
+        try:
+            write_universe_cache(universe, cache_path, filepath)
+        except OSError:
+            return universe  # read-only location: fall back to the parsed universe
+    return open_universe_cache(cache_path)
@@ -0,0 +1,185 @@
+import numpy as np
+from covariance import FactorCovariance
+from fitness_cache import FitnessCache
+from portfolio_GA_New import VectorizedGeneticAlgorithm
+from portfolio_MARKOVITZ import Portfolio as WeightedPortfolio
+from portfolio_PSO import VectorizedPSO
+from universe import as_universe
+
+RISK_AVERSION = 10.0
+
+# Best K of N with optimal weights: the GA / PSO search over K-stock subsets, and each candidate is
+# scored by the optimum of a long-only mean-variance QP on its stocks,
+#     max  mu.w - risk_aversion / 2 * w'Cw   subject to  sum(w) = 1, w >= 0,
+# solved for a whole population of subsets at once. With the simplified diagonal covariance the
+# optimum is closed form; factor or dense covariances use batched accelerated projected gradient
+# (FISTA), started from the closed form for the covariance's diagonal.
+
+def project_to_simplex(v):
+    # Row-wise Euclidean projection onto {w >= 0, sum(w) = 1} (sort-based, O(K log K) per row).
+    u = -np.sort(-v, axis=1)
+    cumulative = np.cumsum(u, axis=1) - 1.0
+    ranks = np.arange(1, v.shape[1] + 1)
+    active = u - cumulative / ranks > 0
+    last = v.shape[1] - 1 - np.argmax(active[:, ::-1], axis=1)
+    theta = cumulative[np.arange(len(v)), last] / (last + 1)
+    return np.maximum(v - theta[:, None], 0.0)
+
+def _weights_with_riskless(mu, variances, risk_aversion):
+    # One row holding zero-variance stocks: only the best of them can be held, and if it is, nu equals its
+    # return and it takes whatever the risky stocks leave. If they would take more than everything, it is
+    # dropped and the risky stocks alone are water-filled.
+    riskless = np.flatnonzero(variances == 0)
+    best = riskless[np.argmax(mu[riskless])]
+    risky = np.flatnonzero(variances > 0)
+    weights = np.zeros(len(mu))
+    excess = np.maximum(mu[risky] - mu[best], 0.0) / (risk_aversion * variances[risky])
+    if excess.sum() <= 1.0:
+        weights[risky] = excess
+        weights[best] = 1.0 - excess.sum()
+    else:
+        weights[risky] = diagonal_weights(mu[None, risky], variances[None, risky], risk_aversion)[0]
+    return weights
+
+def diagonal_weights(mu, variances, risk_aversion):
+    # KKT: w_i = max(0, (mu_i - nu) / (risk_aversion * var_i)), and the held stocks are the top-m by
+    # return, so nu comes from prefix sums over the stocks sorted by return (water-filling).
+    riskless = (variances == 0).any(axis=1)
+    if riskless.any():
+        weights = np.empty(mu.shape)
+        if not riskless.all():
+            weights[~riskless] = diagonal_weights(mu[~riskless], variances[~riskless], risk_aversion)
+        for row in np.flatnonzero(riskless):
+            weights[row] = _weights_with_riskless(mu[row], variances[row], risk_aversion)
+        return weights
+    order = np.argsort(-mu, axis=1)
+    mu_sorted = np.take_along_axis(mu, order, axis=1)
+    inverse = 1.0 / np.take_along_axis(variances, order, axis=1)
+    nu = (np.cumsum(mu_sorted * inverse, axis=1) - risk_aversion) / np.cumsum(inverse, axis=1)
+    held = mu_sorted > nu
+    last = mu.shape[1] - 1 - np.argmax(held[:, ::-1], axis=1)
+    threshold = nu[np.arange(len(mu)), last]
+    return np.maximum(mu - threshold[:, None], 0.0) / (risk_aversion * variances)
+
+class SubsetWeightSolver:
+    def __init__(self, stocks, cov_matrix=None, risk_aversion=RISK_AVERSION, max_iter=500, tol=1e-8,
+                 cache_size=100_000, seed=None):
+        universe = as_universe(stocks)
+        self.returns = universe.returns
+        self.cov_matrix = cov_matrix
+        self.variances = universe.risks ** 2 if cov_matrix is None else None
+        if isinstance(cov_matrix, FactorCovariance) and cov_matrix.num_factors == 0:
+            self.variances = cov_matrix.specific_variances
+        self.risk_aversion = risk_aversion
+        self.max_iter = max_iter
+        self.tol = tol
+        # Subset scores are memoized; re-create the solver (or clear the cache) if stock figures change.
+        self.cache = FitnessCache(len(universe), cache_size, seed) if cache_size else None
+
+    def covariance_times(self, subsets, w):
+        # C_S w for every subset row, without forming the N x N matrix.
+        if self.variances is not None:
+            return self.variances[subsets] * w
+        if isinstance(self.cov_matrix, FactorCovariance):
+            factors = self.cov_matrix.factors[subsets]
+            exposures = np.einsum('mkf,mk->mf', factors, w)
+            return np.einsum('mkf,mf->mk', factors, exposures) + self.cov_matrix.specific_variances[subsets] * w
+        blocks = np.asarray(self.cov_matrix)[subsets[:, :, None], subsets[:, None, :]]
+        return np.einsum('mij,mj->mi', blocks, w)
+
+    def curvature(self, subsets):
+        # Diagonal of C_S and a per-row upper bound on its largest eigenvalue (the gradient's Lipschitz
+        # constant up to risk_aversion).
+        if isinstance(self.cov_matrix, FactorCovariance):
+            factors = self.cov_matrix.factors[subsets]
+            specific = self.cov_matrix.specific_variances[subsets]
+            diagonal = (factors ** 2).sum(axis=2) + specific
+            return diagonal, (factors ** 2).sum(axis=(1, 2)) + specific.max(axis=1)
+        blocks = np.asarray(self.cov_matrix)[subsets[:, :, None], subsets[:, None, :]]
+        return np.diagonal(blocks, axis1=1, axis2=2), np.sqrt((blocks ** 2).sum(axis=(1, 2)))
+
+    def solve(self, subsets):
+        # Optimal weights, one row per subset row (aligned with its stock indexes).
+        subsets = np.asarray(subsets)
+        mu = self.returns[subsets]
+        if self.variances is not None:
+            return diagonal_weights(mu, self.variances[subsets], self.risk_aversion)
+
+        diagonal, bound = self.curvature(subsets)
+        step = 1.0 / (self.risk_aversion * bound)[:, None]
+        weights = diagonal_weights(mu, diagonal, self.risk_aversion)
+        # FISTA with per-row momentum restarts; rows leave the batch once their weights stop moving by
+        # more than tol.
+        active = np.arange(len(subsets))
+        w, y = weights, weights
+        t = np.ones(len(subsets))
+        for _ in range(self.max_iter):
+            gradient = mu[active] - self.risk_aversion * self.covariance_times(subsets[active], y)
+            updated = project_to_simplex(y + step[active] * gradient)
+            moving = np.abs(updated - w).max(axis=1) >= self.tol
+            weights[active] = updated
+            restart = ((y - updated) * (updated - w)).sum(axis=1) > 0
+            t[restart] = 1.0
+            t_next = (1.0 + np.sqrt(1.0 + 4.0 * t * t)) / 2.0
+            y = updated + ((t - 1.0) / t_next)[:, None] * (updated - w)
+            w, y, t = updated[moving], y[moving], t_next[moving]
+            active = active[moving]
+            if not len(active):
+                break
+        return weights
+
+    def utility(self, subsets, weights):
+        return ((self.returns[subsets] * weights).sum(axis=1)
+                - 0.5 * self.risk_aversion * (weights * self.covariance_times(subsets, weights)).sum(axis=1))
+
+    def scores(self, subsets):
+        # Optimal utility per subset; only subsets missing from the cache are solved.
+        subsets = np.asarray(subsets)
+        if self.cache is None:
+            return self.utility(subsets, self.solve(subsets))
+        keys = self.cache.keys(subsets)
+        scores, missing = self.cache.get_many(keys)
+        if missing.any():
+            todo = subsets[missing]
+            solved = self.utility(todo, self.solve(todo))
+            scores[missing] = solved
+            self.cache.put_many([k for k, m in zip(keys, missing) if m], solved)
+        return scores
+
+    def subset_covariance(self, indexes):
+        if self.cov_matrix is None:
+            return None
+        if isinstance(self.cov_matrix, FactorCovariance):
+            return FactorCovariance(self.cov_matrix.factors[indexes], self.cov_matrix.specific_variances[indexes])
+        return np.asarray(self.cov_matrix)[np.ix_(indexes, indexes)]
+
+    def portfolio(self, stocks, indexes):
+        indexes = np.asarray(indexes)
+        weights = self.solve(indexes[None, :])[0]
+        return WeightedPortfolio([stocks[i] for i in indexes], weights, self.subset_covariance(indexes))
+
+class WeightedSubsetGA(VectorizedGeneticAlgorithm):
+    # VectorizedGeneticAlgorithm whose fitness is the optimal weighted utility of each subset.
+    def __init__(self, stocks, population_size, portfolio_size, solver=None, **kwargs):
+        self.solver = solver or SubsetWeightSolver(stocks)
+        super().__init__(stocks, population_size, portfolio_size, **kwargs)
+
+    def evaluate_population(self, population):
+        return self.solver.scores(population)
+
+    def run(self, generations):
+        self.evolve(generations)
+        indexes, _ = self.best()
+        return self.solver.portfolio(self.stocks, indexes)
+
+class WeightedSubsetPSO(VectorizedPSO):
+    def __init__(self, stocks, num_particles, portfolio_size, num_iterations, solver=None, **kwargs):
+        self.solver = solver or SubsetWeightSolver(stocks)
+        super().__init__(stocks, num_particles, portfolio_size, num_iterations, **kwargs)
+
+    def evaluate(self, positions):
+        return self.solver.scores(positions)
+
+    def run(self):
+        super().run()
+        return self.solver.portfolio(self.stocks, self.global_best_position)
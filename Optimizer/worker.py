@@ -0,0 +1,137 @@
+import argparse
+import importlib
+import json
+import socket
+import sys
+import time
+from run_jobs import OPTIMIZER_MODULES, get_universe, read_jobs, run_job
+
+WORKER_HOST = "127.0.0.1"
+WORKER_PORT = 9010
+
+# A resident optimizer process: numpy and the optimizer modules are imported before it serves, and
+# universes and subset-weight solvers stay cached (run_jobs.get_universe / get_solver), so a short job
+# costs its own run time instead of interpreter start-up plus imports plus loading the universe.
+#
+# Clients connect over a local TCP socket and send one JSON object per line. A run_jobs job
+# ({"id", "algorithm", "seed", "universe", "params"}) is answered by one line with its run_job result;
+# {"command": "ping"} reports the worker's uptime and jobs served, and {"command": "shutdown"} stops
+# it. Requests are served one at a time, in arrival order.
+
+class Worker:
+    def __init__(self, host=WORKER_HOST, port=WORKER_PORT):
+        self.host = host
+        self.port = port
+        self.started = time.monotonic()
+        self.jobs = 0
+        self.running = False
+
+    def handle(self, request):
+        if not isinstance(request, dict):
+            return {'status': 'error', 'error': f"Expected a JSON object, got {type(request).__name__}."}
+        command = request.get('command')
+        if command is None:
+            self.jobs += 1
+            return run_job(request)
+        if command == 'ping':
+            return {'status': 'ok', 'uptime': time.monotonic() - self.started, 'jobs': self.jobs}
+        if command == 'shutdown':
+            self.running = False
+            return {'status': 'ok'}
+        return {'status': 'error', 'error': f"Unknown command {command!r}."}
+
+    def serve_connection(self, conn):
+        with conn, conn.makefile('r', encoding='utf-8') as reader, conn.makefile('w', encoding='utf-8') as writer:
+            for line in reader:
+                if not line.strip():
+                    continue
+                try:
+                    response = self.handle(json.loads(line))
+                except Exception as e:
+                    # A malformed request is answered with an error; it must not stop the worker.
+                    response = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(response) + '\n')
+                writer.flush()
+                if not self.running:
+                    break
+
+    def serve(self, ready=None):
+        # ready(address) is called once the socket accepts connections (port 0 picks a free port).
+        with socket.create_server((self.host, self.port)) as server:
+            self.port = server.getsockname()[1]
+            self.running = True
+            if ready is not None:
+                ready((self.host, self.port))
+            while self.running:
+                conn, _ = server.accept()
+                try:
+                    self.serve_connection(conn)
+                except Exception:
+                    continue  # a client that disconnects or sends undecodable bytes does not stop the worker
+
+class WorkerClient:
+    # One connection to a running Worker; requests on it are answered in order.
+    def __init__(self, host=WORKER_HOST, port=WORKER_PORT, timeout=None):
+        self.conn = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.conn.makefile('r', encoding='utf-8')
+        self.writer = self.conn.makefile('w', encoding='utf-8')
+
+    def request(self, message):
+        self.writer.write(json.dumps(message) + '\n')
+        self.writer.flush()
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Worker closed the connection.")
+        return json.loads(line)
+
+    def run(self, job):
+        return self.request(job)
+
+    def ping(self):
+        return self.request({'command': 'ping'})
+
+    def shutdown(self):
+        return self.request({'command': 'shutdown'})
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# --- Main program ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident optimizer worker serving run_jobs jobs over a socket.")
+    parser.add_argument('--host', default=WORKER_HOST)
+    parser.add_argument('--port', type=int, default=WORKER_PORT, help="0 picks a free port")
+    parser.add_argument('--preload', nargs='*', default=[], help="universe CSV paths to load before serving")
+    parser.add_argument('--submit', help="send this JSON-lines job file to a running worker instead of serving")
+    parser.add_argument('--shutdown', action='store_true', help="stop a running worker")
+    args = parser.parse_args()
+
+    if args.submit or args.shutdown:
+        with WorkerClient(args.host, args.port) as client:
+            failures = 0
+            for job in read_jobs(args.submit) if args.submit else []:
+                result = client.run(job)
+                failures += result['status'] != 'ok'
+                print(json.dumps(result), flush=True)
+            if args.shutdown:
+                client.shutdown()
+        sys.exit(1 if failures else 0)
+
+    for module in OPTIMIZER_MODULES:
+        importlib.import_module(module)
+    for path in args.preload:
+        get_universe(path)
+    worker = Worker(args.host, args.port)
+    try:
+        worker.serve(ready=lambda address: print(f"🟢 Worker listening on {address[0]}:{address[1]}", flush=True))
+    except KeyboardInterrupt:
+        pass
+    print(f"✅ Served {worker.jobs} jobs", flush=True)
@@ -1,8 +1,8 @@
-import yfinance as yf
-import boto3
-from botocore.exceptions import NoCredentialsError
+import json
 import os
-from datetime import datetime
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 
 # -------------------------------
 # CONFIGURATION
@@ -11,51 +11,185 @@ TICKERS = ["AAPL", "GOOGL", "MSFT"]
 START_DATE = "2023-01-01"
 END_DATE = datetime.today().strftime('%Y-%m-%d')
 LOCAL_DIR = "data/raw"
+MANIFEST_PATH = os.path.join(LOCAL_DIR, "manifest.json")  # last stored bar per ticker
+PARQUET_DIR = "data/parquet"
 BUCKET_NAME = "stock-data"
 MINIO_ENDPOINT = "localhost:9000"
 ACCESS_KEY = "admin"
 SECRET_KEY = "admin123"
 USE_SSL = False  # Keep it False for localhost
+BATCH_SIZE = 50  # tickers per yf.download call
+MAX_WORKERS = 8  # concurrent downloads / uploads
+
+
+# yfinance and boto3 are imported by the functions that use them, so importing this module (for the
+# manifest / batching helpers or LocalObjectStore) stays cheap and works without them installed.
 
 # -------------------------------
-# Ensure local folder exists
+# Data sources
 # -------------------------------
-os.makedirs(LOCAL_DIR, exist_ok=True)
+# A source is any object with download(tickers, start, end) returning {ticker: DataFrame}, where each
+# frame has the (Price, Ticker) column levels and Date index that yf.download writes to CSV.
+class YahooFinanceSource:
+    def download(self, tickers, start, end):
+        import yfinance as yf
+        data = yf.download(tickers, start=start, end=end, progress=False)
+        if data is None or data.empty:
+            return {}
+        available = set(data.columns.get_level_values(1))
+        return {
+            ticker: data.xs(ticker, axis=1, level=1, drop_level=False).dropna(how='all')
+            for ticker in tickers if ticker in available
+        }
+
 
 # -------------------------------
-# Initialize S3 client
+# Object storage
 # -------------------------------
-s3 = boto3.client(
-    's3',
-    endpoint_url=f"http{'s' if USE_SSL else ''}://{MINIO_ENDPOINT}",
-    aws_access_key_id=ACCESS_KEY,
-    aws_secret_access_key=SECRET_KEY,
-    verify=USE_SSL
-)
+def create_s3_client():
+    import boto3
+    return boto3.client(
+        's3',
+        endpoint_url=f"http{'s' if USE_SSL else ''}://{MINIO_ENDPOINT}",
+        aws_access_key_id=ACCESS_KEY,
+        aws_secret_access_key=SECRET_KEY,
+        verify=USE_SSL
+    )
+
+
+class LocalObjectStore:
+    # Directory-backed stand-in for the boto3 S3 client methods used here, for offline runs.
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def list_buckets(self):
+        return {'Buckets': [{'Name': name} for name in sorted(os.listdir(self.root))
+                            if os.path.isdir(os.path.join(self.root, name))]}
+
+    def create_bucket(self, Bucket):
+        os.makedirs(os.path.join(self.root, Bucket), exist_ok=True)
+
+    def upload_file(self, Filename, Bucket, Key):
+        shutil.copyfile(Filename, os.path.join(self.root, Bucket, Key))
+
+
+def ensure_bucket(s3, bucket=BUCKET_NAME):
+    existing_buckets = s3.list_buckets()
+    if bucket not in [b['Name'] for b in existing_buckets.get('Buckets', [])]:
+        s3.create_bucket(Bucket=bucket)
+        print(f"✅ Created bucket: {bucket}")
+    else:
+        print(f"✅ Bucket '{bucket}' already exists.")
+
+
+def upload(s3, local_path, bucket, key):
+    try:
+        s3.upload_file(local_path, bucket, key)
+        print(f"✅ Uploaded: {key}")
+    except Exception as e:
+        # botocore's NoCredentialsError, matched by name so LocalObjectStore uploads need no botocore.
+        if type(e).__name__ != 'NoCredentialsError':
+            raise
+        print("❌ Credentials not available for MinIO upload.")
+
 
 # -------------------------------
-# Create bucket if it doesn't exist
+# Watermark manifest
 # -------------------------------
-existing_buckets = s3.list_buckets()
-if BUCKET_NAME not in [b['Name'] for b in existing_buckets.get('Buckets', [])]:
-    s3.create_bucket(Bucket=BUCKET_NAME)
-    print(f"✅ Created bucket: {BUCKET_NAME}")
-else:
-    print(f"✅ Bucket '{BUCKET_NAME}' already exists.")
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def plan_batches(tickers, manifest, start=START_DATE, end=END_DATE, batch_size=BATCH_SIZE):
+    # Tickers are grouped by the day after their last stored bar so one download call covers a batch.
+    by_start = {}
+    for ticker in tickers:
+        last_bar = manifest.get(ticker)
+        ticker_start = start
+        if last_bar:
+            ticker_start = (datetime.strptime(last_bar, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        if ticker_start < end:
+            by_start.setdefault(ticker_start, []).append(ticker)
+    return [(batch_start, group[i:i + batch_size])
+            for batch_start, group in sorted(by_start.items())
+            for i in range(0, len(group), batch_size)]
+
+
+def store_bars(ticker, data, local_dir, last_bar=None):
+    local_path = os.path.join(local_dir, f"{ticker}.csv")
+    if last_bar and os.path.exists(local_path):
+        # Same row layout as the existing file, so new bars are appended below its headers.
+        data.to_csv(local_path, mode='a', header=False)
+    else:
+        data.to_csv(local_path)
+    return local_path
+
 
 # -------------------------------
 # Download and upload data
 # -------------------------------
-for ticker in TICKERS:
-    print(f"📥 Downloading data for {ticker}...")
-    data = yf.download(ticker, start=START_DATE, end=END_DATE)
-    filename = f"{ticker}.csv"
-    local_path = os.path.join(LOCAL_DIR, filename)
-    data.to_csv(local_path)
+def ingest(tickers, source, s3, local_dir=LOCAL_DIR, manifest_path=MANIFEST_PATH, start=START_DATE,
+           end=END_DATE, bucket=BUCKET_NAME, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS, parquet_dir=None):
+    os.makedirs(local_dir, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    batches = plan_batches(tickers, manifest, start, end, batch_size)
+    new_bars = {}
 
-    print(f"☁️ Uploading {filename} to MinIO...")
+    # The manifest records every ticker whose bars reached its CSV, even if a later download or upload
+    # fails, so a rerun never appends the same bars twice.
     try:
-        s3.upload_file(local_path, BUCKET_NAME, filename)
-        print(f"✅ Uploaded: {filename}")
-    except NoCredentialsError:
-        print("❌ Credentials not available for MinIO upload.")
+        with ThreadPoolExecutor(max_workers=max_workers) as download_pool, \
+                ThreadPoolExecutor(max_workers=max_workers) as upload_pool:
+            downloads = {}
+            for batch_start, batch in batches:
+                print(f"📥 Downloading {len(batch)} tickers from {batch_start}...")
+                downloads[download_pool.submit(source.download, batch, batch_start, end)] = batch
+
+            uploads = []
+            for future in as_completed(downloads):
+                for ticker, data in future.result().items():
+                    last_bar = manifest.get(ticker)
+                    if last_bar:
+                        data = data[data.index > last_bar]
+                    if data.empty:
+                        continue
+                    local_path = store_bars(ticker, data, local_dir, last_bar)
+                    manifest[ticker] = data.index.max().strftime('%Y-%m-%d')
+                    new_bars[ticker] = data
+                    print(f"☁️ Uploading {ticker}.csv to MinIO...")
+                    uploads.append(upload_pool.submit(upload, s3, local_path, bucket, f"{ticker}.csv"))
+            for future in uploads:
+                future.result()
+    finally:
+        try:
+            if parquet_dir is not None and new_bars:
+                # Also upsert into the columnar store (see load_to_db.py).
+                import pandas as pd
+                from load_to_db import bars_to_frame, write_prices
+                write_prices(pd.concat([bars_to_frame(t, data) for t, data in new_bars.items()],
+                                       ignore_index=True), parquet_dir)
+        finally:
+            save_manifest(manifest, manifest_path)
+
+    return new_bars
+
+
+if __name__ == "__main__":
+    s3 = create_s3_client()
+    ensure_bucket(s3)
+    new_bars = ingest(TICKERS, YahooFinanceSource(), s3, parquet_dir=PARQUET_DIR)
+
+    # Fold only the new bars into the running statistics and refresh summary.csv.
+    from incremental_stats import update_summary
+    update_summary(new_bars, raw_dir=LOCAL_DIR)
@@ -0,0 +1,201 @@
+import json
+import math
+import os
+from collections import deque
+from pathlib import Path
+
+import pandas as pd
+
+from transform import PROCESSED_DIR, RAW_DIR, TRADING_DAYS_PER_MONTH, read_close_prices
+
+# ----------------------------
+# Config
+# ----------------------------
+STATE_PATH = PROCESSED_DIR / "stats_state.json"
+SUMMARY_PATH = PROCESSED_DIR / "summary.csv"
+ROLLING_WINDOW = 63  # daily returns kept for rolling figures (~3 months)
+
+
+# ----------------------------
+# Per-ticker running statistics
+# ----------------------------
+class TickerStats:
+    # Welford mean/variance of daily returns, so each new bar is an O(1) update. The latest bar can be
+    # revised (intraday ticks, or the final close arriving later): its return is removed and re-added.
+    def __init__(self, count=0, mean=0.0, m2=0.0, last_price=None, last_date=None, window=(),
+                 previous_price=None, evicted=None, window_size=ROLLING_WINDOW):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.last_price = last_price
+        self.last_date = last_date
+        self.window = deque(window, maxlen=window_size)
+        self.previous_price = previous_price  # close before last_date, base of the latest return
+        self.evicted = evicted  # window entry pushed out by the latest return
+
+    def add_return(self, daily_return):
+        self.count += 1
+        delta = daily_return - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (daily_return - self.mean)
+        full = len(self.window) == self.window.maxlen
+        self.evicted = self.window[0] if full and self.window else None
+        self.window.append(daily_return)
+
+    def remove_last_return(self):
+        daily_return = self.window.pop()
+        if self.evicted is not None:
+            self.window.appendleft(self.evicted)
+            self.evicted = None
+        self.count -= 1
+        if self.count == 0:
+            self.mean = self.m2 = 0.0
+            return
+        mean = self.mean
+        self.mean = (mean * (self.count + 1) - daily_return) / self.count
+        self.m2 = max(self.m2 - (daily_return - self.mean) * (daily_return - mean), 0.0)
+
+    def add_price(self, date, price):
+        if date == self.last_date:
+            # Same day again: the new price replaces the latest close instead of adding a return.
+            if self.previous_price is not None:
+                self.remove_last_return()
+                self.add_return(price / self.previous_price - 1)
+            self.last_price = price
+            return
+        if self.last_price is not None:
+            self.add_return(price / self.last_price - 1)
+        self.previous_price = self.last_price
+        self.last_price = price
+        self.last_date = date
+
+    def monthly_return(self):
+        return self.mean * TRADING_DAYS_PER_MONTH if self.count else math.nan
+
+    def risk(self):
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(self.m2 / (self.count - 1)) * TRADING_DAYS_PER_MONTH ** 0.5
+
+    def rolling_monthly_return(self):
+        return sum(self.window) / len(self.window) * TRADING_DAYS_PER_MONTH if self.window else math.nan
+
+    def rolling_risk(self):
+        n = len(self.window)
+        if n < 2:
+            return math.nan
+        mean = sum(self.window) / n
+        return math.sqrt(sum((r - mean) ** 2 for r in self.window) / (n - 1)) * TRADING_DAYS_PER_MONTH ** 0.5
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'last_price': self.last_price,
+                'last_date': self.last_date, 'window': list(self.window), 'previous_price': self.previous_price,
+                'evicted': self.evicted}
+
+    @classmethod
+    def from_dict(cls, data, window_size=ROLLING_WINDOW):
+        return cls(window_size=window_size, **data)
+
+
+# ----------------------------
+# Persisted store for all tickers
+# ----------------------------
+class IncrementalStatsStore:
+    def __init__(self, path=STATE_PATH, window_size=ROLLING_WINDOW):
+        self.path = Path(path)
+        self.window_size = window_size
+        self.stats = {}
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                self.stats = {ticker: TickerStats.from_dict(data, window_size) for ticker, data in json.load(f).items()}
+
+    def get(self, ticker):
+        stats = self.stats.get(ticker)
+        if stats is None:
+            stats = self.stats[ticker] = TickerStats(window_size=self.window_size)
+        return stats
+
+    def update(self, ticker, prices):
+        # prices: Series indexed by date. Bars before the stored last_date are ignored; a bar on it
+        # replaces that day's (possibly provisional) close.
+        stats = self.get(ticker)
+        prices = prices.dropna()
+        prices.index = pd.to_datetime(prices.index)
+        prices = prices.sort_index()
+        if stats.last_date is not None:
+            prices = prices[prices.index >= pd.Timestamp(stats.last_date)]
+        for date, price in prices.items():
+            stats.add_price(pd.Timestamp(date).strftime('%Y-%m-%d'), float(price))
+        return len(prices)
+
+    def add_tick(self, ticker, date, price):
+        # One intraday price; returns False for a tick older than the latest bar.
+        stats = self.get(ticker)
+        if stats.last_date is not None and date < stats.last_date:
+            return False
+        stats.add_price(date, price)
+        return True
+
+    def refresh(self, new_bars, raw_dir=RAW_DIR):
+        # new_bars as returned by fetch_data.ingest. A ticker without state is bootstrapped from its
+        # full raw CSV once; afterwards only the new bars are folded in.
+        for ticker, data in new_bars.items():
+            raw_path = Path(raw_dir) / f"{ticker}.csv"
+            if ticker not in self.stats and raw_path.exists():
+                self.update(ticker, read_close_prices(raw_path))
+            else:
+                close = data['Close']
+                self.update(ticker, close[ticker] if isinstance(close, pd.DataFrame) else close)
+        # Raw CSVs not yet in the state (a first run, or tickers without new bars this time) are
+        # bootstrapped too, so the summary written afterwards still covers every ticker.
+        for raw_path in sorted(Path(raw_dir).glob("*.csv")):
+            if raw_path.stem not in self.stats:
+                prices = read_close_prices(raw_path)
+                self.update(prices.name, prices)
+
+    def summary_frame(self):
+        tickers = sorted(self.stats)
+        return pd.DataFrame({
+            'ticker': tickers,
+            'price_per_stock': [round(self.stats[t].last_price, 2) for t in tickers],
+            'monthly_return': [round(self.stats[t].monthly_return(), 4) for t in tickers],
+            'risk': [round(self.stats[t].risk(), 4) for t in tickers],
+        })
+
+    def rolling_frame(self):
+        tickers = sorted(self.stats)
+        return pd.DataFrame({
+            'ticker': tickers,
+            'rolling_monthly_return': [self.stats[t].rolling_monthly_return() for t in tickers],
+            'rolling_risk': [self.stats[t].rolling_risk() for t in tickers],
+        })
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({ticker: stats.to_dict() for ticker, stats in self.stats.items()}, f)
+        os.replace(tmp_path, self.path)
+
+    def write_summary(self, path=SUMMARY_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.summary_frame().to_csv(path, index=False)
+
+
+def update_summary(new_bars, raw_dir=RAW_DIR, state_path=STATE_PATH, summary_path=SUMMARY_PATH):
+    store = IncrementalStatsStore(state_path)
+    store.refresh(new_bars, raw_dir)
+    store.save()
+    store.write_summary(summary_path)
+    return store
+
+
+if __name__ == "__main__":
+    # Bootstrap (or catch up) the state from every raw CSV; bars already folded in are skipped.
+    store = IncrementalStatsStore(STATE_PATH)
+    for file in sorted(RAW_DIR.glob("*.csv")):
+        prices = read_close_prices(file)
+        store.update(prices.name, prices)
+    store.save()
+    store.write_summary()
+    print(f"✅ Summary saved to {SUMMARY_PATH}")
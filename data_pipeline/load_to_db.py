@@ -0,0 +1,121 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pathlib import Path
+
+from transform import RAW_DIR, read_raw_csv
+
+# ----------------------------
+# Config
+# ----------------------------
+PARQUET_DIR = Path("data/parquet")
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+# One directory per ticker and year (hive style: ticker=AAPL/year=2024/), typed columns inside.
+SCHEMA = pa.schema([
+    ('date', pa.date32()),
+    ('open', pa.float64()),
+    ('high', pa.float64()),
+    ('low', pa.float64()),
+    ('close', pa.float64()),
+    ('volume', pa.float64()),
+    ('ticker', pa.string()),
+    ('year', pa.int16()),
+])
+PARTITIONING = ds.partitioning(pa.schema([('ticker', pa.string()), ('year', pa.int16())]), flavor='hive')
+
+
+# ----------------------------
+# Conversion helpers
+# ----------------------------
+def bars_to_frame(ticker, data):
+    # yf.download layout: Date index, (Price, Ticker) column levels -> one row per date.
+    frame = data.droplevel(-1, axis=1) if isinstance(data.columns, pd.MultiIndex) else data
+    frame = frame.rename(columns=str.lower).reset_index().rename(columns={'Date': 'date', 'index': 'date'})
+    frame['ticker'] = ticker
+    return frame
+
+
+def raw_csv_to_frame(file_path):
+    ticker, df = read_raw_csv(file_path)
+    suffix = f"_{ticker}"
+    df = df.rename(columns=lambda col: col[:-len(suffix)].lower() if col.endswith(suffix) else col)
+    df = df.rename(columns={'Date': 'date'})
+    df['ticker'] = ticker
+    return df
+
+
+def _to_table(frame):
+    frame = frame.copy()
+    frame['date'] = pd.to_datetime(frame['date']).dt.date
+    frame['year'] = pd.to_datetime(frame['date']).dt.year.astype('int16')
+    for field in FIELDS:
+        if field not in frame.columns:
+            frame[field] = float('nan')
+    return pa.Table.from_pandas(frame[SCHEMA.names], schema=SCHEMA, preserve_index=False)
+
+
+# ----------------------------
+# Write
+# ----------------------------
+def write_prices(frame, root=PARQUET_DIR):
+    # Upsert: only the (ticker, year) partitions present in frame are rewritten, merged with what
+    # they already hold so appending new bars keeps the older ones.
+    root = Path(root)
+    frame = frame.copy()
+    frame['date'] = pd.to_datetime(frame['date'])
+    frame['year'] = frame['date'].dt.year
+    touched = frame[['ticker', 'year']].drop_duplicates()
+
+    if root.exists():
+        # Two isin filters instead of one clause per (ticker, year): they may also read untouched
+        # partitions of these tickers and years, which is harmless because whole partitions are read
+        # and written back with the merged frame.
+        condition = (ds.field('ticker').isin(touched['ticker'].unique().tolist())
+                     & ds.field('year').isin([int(year) for year in touched['year'].unique()]))
+        dataset = ds.dataset(root, format='parquet', schema=SCHEMA, partitioning=PARTITIONING)
+        existing = dataset.to_table(filter=condition).to_pandas()
+        if len(existing):
+            existing['date'] = pd.to_datetime(existing['date'])
+            frame = pd.concat([existing, frame], ignore_index=True)
+    frame = frame.drop_duplicates(['ticker', 'date'], keep='last').sort_values(['ticker', 'date'])
+
+    # pyarrow caps a write at 1024 partitions by default; a full universe touches one per ticker and year.
+    partitions = len(frame[['ticker', 'year']].drop_duplicates())
+    ds.write_dataset(_to_table(frame), root, format='parquet', partitioning=PARTITIONING,
+                     existing_data_behavior='delete_matching', max_partitions=max(partitions, 1024),
+                     basename_template='part-{i}.parquet')
+
+
+def load_raw_csvs(raw_dir=RAW_DIR, root=PARQUET_DIR):
+    frames = [raw_csv_to_frame(file) for file in sorted(Path(raw_dir).glob("*.csv"))]
+    if frames:
+        write_prices(pd.concat(frames, ignore_index=True), root)
+    return len(frames)
+
+
+# ----------------------------
+# Read
+# ----------------------------
+def read_prices(tickers, start=None, end=None, field='close', root=PARQUET_DIR):
+    # Dense dates x tickers matrix for one field. The ticker/year filters prune partitions and the
+    # date filter is pushed down to Parquet row-group statistics, so only matching data is read.
+    dataset = ds.dataset(root, format='parquet', schema=SCHEMA, partitioning=PARTITIONING)
+    condition = ds.field('ticker').isin(list(tickers))
+    if start is not None:
+        start = pd.Timestamp(start)
+        condition &= (ds.field('year') >= start.year) & (ds.field('date') >= pa.scalar(start.date(), pa.date32()))
+    if end is not None:
+        end = pd.Timestamp(end)
+        condition &= (ds.field('year') <= end.year) & (ds.field('date') <= pa.scalar(end.date(), pa.date32()))
+
+    table = dataset.to_table(columns=['date', 'ticker', field], filter=condition)
+    frame = table.to_pandas()
+    frame['date'] = pd.to_datetime(frame['date'])
+    prices = frame.pivot(index='date', columns='ticker', values=field).sort_index()
+    return prices.reindex(columns=list(tickers))
+
+
+if __name__ == "__main__":
+    count = load_raw_csvs()
+    print(f"✅ Loaded {count} raw CSVs into {PARQUET_DIR}")
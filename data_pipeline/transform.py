@@ -1,18 +1,20 @@
+import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # ----------------------------
 # Config
 # ----------------------------
 RAW_DIR = Path("data/raw")
-PROCESSED_DIR = Path("data/processed")
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+PROCESSED_DIR = Path("data/processed")  # created by the scripts that write to it, not on import
+TRADING_DAYS_PER_MONTH = 21
 
 
 # ----------------------------
-# Function to process each CSV
+# Function to read a raw yfinance CSV
 # ----------------------------
-def process_file(file_path):
+def read_raw_csv(file_path):
     # Read CSV with multi-index headers and skip the spurious 'Date' header row at line 2
     df = pd.read_csv(file_path, header=[0,1], skiprows=[2])
 
@@ -43,6 +45,15 @@ def process_file(file_path):
     if ticker is None:
         ticker = "Unknown"
 
+    return ticker, df
+
+
+# ----------------------------
+# Function to process each CSV
+# ----------------------------
+def process_file(file_path):
+    ticker, df = read_raw_csv(file_path)
+
     # Use Close price for price column
     close_col = f"Close_{ticker}"
     if close_col not in df.columns:
@@ -65,19 +76,67 @@ def process_file(file_path):
 
 
 
+# ----------------------------
+# Panel engine: all tickers at once
+# ----------------------------
+def read_close_prices(file_path):
+    # Only the Date and Close columns are parsed; the ticker comes from the second header row.
+    with open(file_path, encoding='utf-8') as f:
+        fields = f.readline().strip().split(',')
+        tickers = f.readline().strip().split(',')
+    if 'Close' not in fields:
+        raise ValueError(f"No 'Close' price column found in file {Path(file_path).name}")
+    close_idx = fields.index('Close')
+    prices = pd.read_csv(file_path, skiprows=3, header=None, usecols=[0, close_idx],
+                         names=['Date', 'Price'], index_col='Date')['Price']
+    return prices.rename(tickers[close_idx] or "Unknown")
+
+
+def load_panel(files, processes=None):
+    # Wide Date x ticker panel of close prices; parsing fans out over a process pool if requested.
+    files = list(files)
+    if processes and processes > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            series = list(pool.map(read_close_prices, files, chunksize=max(1, len(files) // (processes * 4))))
+    else:
+        series = [read_close_prices(file) for file in files]
+    if not series:
+        return pd.DataFrame()
+    # Dates stay as ISO strings while aligning and are converted once for the whole panel.
+    panel = pd.concat(series, axis=1)
+    panel.index = pd.to_datetime(panel.index)
+    return panel.sort_index()
+
+
+def daily_returns(panel):
+    # Same as process_file's pct_change per ticker: a return is taken against the ticker's own previous
+    # bar even when other tickers trade on days it does not.
+    return panel.ffill().pct_change(fill_method=None).where(panel.notna())
+
+
+def summarize_panel(panel):
+    returns = daily_returns(panel)
+    return pd.DataFrame({
+        'ticker': panel.columns,
+        'price_per_stock': panel.ffill().iloc[-1].round(2).to_numpy(),
+        'monthly_return': (returns.mean() * TRADING_DAYS_PER_MONTH).round(4).to_numpy(),
+        'risk': (returns.std() * (TRADING_DAYS_PER_MONTH ** 0.5)).round(4).to_numpy(),
+    })
+
+
 # ----------------------------
 # Process All Files
 # ----------------------------
-summary_data = []
-for file in RAW_DIR.glob("*.csv"):
-    print(f"Processing {file.name}")
-    stats = process_file(file)
-    summary_data.append(stats)
-
-# Create summary DataFrame
-summary_df = pd.DataFrame(summary_data)
-
-# Save processed summary
-summary_path = PROCESSED_DIR / "summary.csv"
-summary_df.to_csv(summary_path, index=False)
-print(f"✅ Summary saved to {summary_path}")
+if __name__ == "__main__":
+    files = sorted(RAW_DIR.glob("*.csv"))
+    print(f"Processing {len(files)} files")
+    panel = load_panel(files, processes=os.cpu_count())
+
+    # Create summary DataFrame
+    summary_df = summarize_panel(panel)
+
+    # Save processed summary
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    summary_path = PROCESSED_DIR / "summary.csv"
+    summary_df.to_csv(summary_path, index=False)
+    print(f"✅ Summary saved to {summary_path}")
@@ -0,0 +1,209 @@
+import argparse
+import csv
+import math
+import queue
+import socket
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "data_pipeline"))
+from incremental_stats import STATE_PATH, SUMMARY_PATH, IncrementalStatsStore  # noqa: E402
+
+# ----------------------------
+# Config
+# ----------------------------
+MAX_BATCH_SIZE = 500  # ticks per micro-batch
+MAX_LATENCY = 0.5  # seconds from a tick's arrival to the publication of its batch
+QUEUE_SIZE = 10_000  # ticks buffered between the source and the batcher before the source blocks
+REPLAY_HOST = "127.0.0.1"
+REPLAY_PORT = 9009
+
+Tick = namedtuple('Tick', ['ticker', 'timestamp', 'price'])
+
+
+def parse_tick(fields):
+    # fields: ticker, ISO timestamp, price
+    ticker, timestamp, price = fields
+    return Tick(ticker, datetime.fromisoformat(timestamp), float(price))
+
+
+# ----------------------------
+# Tick sources
+# ----------------------------
+# A source is any iterable of Ticks. These two stand in for a Kafka consumer: a CSV replay
+# (ticker,timestamp,price rows) and the same rows read as lines from a TCP socket.
+class FileReplaySource:
+    def __init__(self, path, speed=None):
+        self.path = Path(path)
+        self.speed = speed  # None: as fast as possible; 1.0: real time; 60.0: a minute per second
+
+    def __iter__(self):
+        start_wall = start_tick = None
+        with open(self.path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # header
+            for row in reader:
+                tick = parse_tick(row)
+                if self.speed:
+                    if start_tick is None:
+                        start_wall, start_tick = time.monotonic(), tick.timestamp
+                    due = (tick.timestamp - start_tick).total_seconds() / self.speed
+                    delay = start_wall + due - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                yield tick
+
+
+class SocketSource:
+    def __init__(self, host=REPLAY_HOST, port=REPLAY_PORT):
+        self.host = host
+        self.port = port
+
+    def __iter__(self):
+        with socket.create_connection((self.host, self.port)) as conn, conn.makefile('r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield parse_tick(line.strip().split(','))
+
+
+def serve_replay(path, host=REPLAY_HOST, port=REPLAY_PORT, speed=None):
+    # Replays a tick CSV to the first client that connects, as SocketSource expects it.
+    with socket.create_server((host, port)) as server:
+        conn, _ = server.accept()
+        with conn, conn.makefile('w', encoding='utf-8') as f:
+            for tick in FileReplaySource(path, speed):
+                f.write(f"{tick.ticker},{tick.timestamp.isoformat()},{tick.price}\n")
+
+
+# ----------------------------
+# Micro-batching
+# ----------------------------
+_END = object()
+
+
+class PriceStream:
+    # A reader thread moves ticks from the source into a bounded queue; run() drains it in batches of
+    # up to max_batch_size ticks, closing a batch at the latest max_latency after its first tick arrived.
+    # Each batch is folded into the running statistics and the refreshed figures of the tickers it
+    # touched are passed to every subscriber. Subscribers run on the batching thread, so a slow one
+    # fills the queue and the reader stops pulling from the source: backpressure instead of growth.
+    def __init__(self, source, store=None, max_batch_size=MAX_BATCH_SIZE, max_latency=MAX_LATENCY,
+                 queue_size=QUEUE_SIZE):
+        self.source = source
+        self.store = store if store is not None else IncrementalStatsStore(STATE_PATH)
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.subscribers = []
+        self.stopped = threading.Event()
+        self.error = None
+        self.ticks = 0
+        self.batches = 0
+        self.max_observed_latency = 0.0
+
+    def subscribe(self, callback):
+        # callback(updates): updates maps ticker -> {'price_per_stock', 'monthly_return', 'risk'}, all finite.
+        self.subscribers.append(callback)
+
+    def stop(self):
+        self.stopped.set()
+
+    def _read(self):
+        try:
+            for tick in self.source:
+                while not self.stopped.is_set():
+                    try:
+                        self.queue.put((tick, time.monotonic()), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if self.stopped.is_set():
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            self.queue.put(_END)
+
+    def next_batch(self):
+        # Ticks for one batch with the arrival time of the first, or None once the source is exhausted.
+        item = self.queue.get()
+        if item is _END:
+            return None
+        batch = [item[0]]
+        first_arrival = item[1]
+        deadline = first_arrival + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _END:
+                self.queue.put(_END)  # seen again by the next call
+                break
+            batch.append(item[0])
+        return batch, first_arrival
+
+    def apply(self, batch):
+        changed = set()
+        for tick in batch:
+            if self.store.add_tick(tick.ticker, tick.timestamp.strftime('%Y-%m-%d'), tick.price):
+                changed.add(tick.ticker)
+        # A ticker is published only once it has the two returns a risk needs.
+        changed = {ticker for ticker in changed if not math.isnan(self.store.stats[ticker].risk())}
+        return {ticker: {'price_per_stock': round(self.store.stats[ticker].last_price, 2),
+                         'monthly_return': round(self.store.stats[ticker].monthly_return(), 4),
+                         'risk': round(self.store.stats[ticker].risk(), 4)}
+                for ticker in sorted(changed)}
+
+    def run(self):
+        reader = threading.Thread(target=self._read, daemon=True)
+        reader.start()
+        while not self.stopped.is_set():
+            result = self.next_batch()
+            if result is None:
+                break
+            batch, first_arrival = result
+            updates = self.apply(batch)
+            if updates:
+                for callback in self.subscribers:
+                    callback(updates)
+            self.ticks += len(batch)
+            self.batches += 1
+            self.max_observed_latency = max(self.max_observed_latency, time.monotonic() - first_arrival)
+        self.stopped.set()
+        reader.join(timeout=1.0)
+        if self.error is not None:
+            raise self.error
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream price ticks into the running summary statistics.")
+    parser.add_argument('--file', help="replay ticks from this CSV (ticker,timestamp,price)")
+    parser.add_argument('--host', default=REPLAY_HOST)
+    parser.add_argument('--port', type=int, default=REPLAY_PORT)
+    parser.add_argument('--serve', action='store_true', help="serve --file over the socket instead of consuming")
+    parser.add_argument('--speed', type=float, help="replay speed multiplier (default: as fast as possible)")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_replay(args.file, args.host, args.port, args.speed)
+        sys.exit(0)
+
+    source = FileReplaySource(args.file, args.speed) if args.file else SocketSource(args.host, args.port)
+    stream = PriceStream(source)
+    stream.subscribe(lambda updates: print(f"📈 {len(updates)} tickers updated: {', '.join(updates)}"))
+    try:
+        stream.run()
+    except KeyboardInterrupt:
+        stream.stop()
+    stream.store.save()
+    stream.store.write_summary(SUMMARY_PATH)
+    print(f"✅ {stream.ticks} ticks in {stream.batches} batches, max latency {stream.max_observed_latency:.3f}s; "
+          f"summary saved to {SUMMARY_PATH}")